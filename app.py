@@ -1,226 +1,1660 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+import time
+_import_started = time.perf_counter()
+
+from flask import Flask, render_template, request, jsonify, redirect, url_for, g, Response, stream_with_context
 import requests
-from bs4 import BeautifulSoup
+import codecs
+from html.parser import HTMLParser
 import re
-import time
+import os
+import math
 import random
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from contextlib import contextmanager
+from enum import IntEnum
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
 import threading
-from urllib.parse import urljoin, urlparse
-import nltk
-from nltk.corpus import wordnet
-from nltk.tokenize import word_tokenize
+import sqlite3
+import mmap
+import struct
+import tempfile
+from urllib.parse import urljoin, urlparse, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
 import json
+import hashlib
+import uuid
+import click
 
-# Download required NLTK data
 try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
-
-try:
-    nltk.data.find('corpora/wordnet')
-except LookupError:
-    nltk.download('wordnet')
+    import numpy as np
+except ImportError:  # NumPy is an optional grid backend
+    np = None
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
 
-class CrosswordGenerator:
-    def __init__(self):
-        self.grid = []
-        self.words = []
-        self.positions = []
-        self.max_size = 20
-        
-    def create_grid(self, size):
-        """Create an empty grid"""
-        return [[' ' for _ in range(size)] for _ in range(size)]
+# NLTK is imported and its corpora loaded on first use (or by warm_up), never
+# at import time. Missing WordNet data is downloaded once, on first use, into a
+# writable directory (the image or build step may not have installed it).
+NLTK_RESOURCES = {'wordnet': 'corpora/wordnet'}
+NLTK_DOWNLOAD_DIR = os.environ.get('NLTK_DOWNLOAD_DIR', os.path.join(tempfile.gettempdir(), 'nltk_data'))
+
+# Startup costs, reported by /api/status
+STARTUP_STATS = {
+    'import_seconds': None,
+    'warm_up_seconds': None,
+    'first_request_seconds': None,
+}
+
+_wordnet = None
+_wordnet_error = None
+_nltk_lock = threading.Lock()
+
+def ensure_nltk_data(download=False):
+    """Check for the NLTK data the app needs, downloading it if asked to
+
+    Returns the names of the resources that are still missing.
+    """
+    import nltk
+    missing = []
+    for name, path in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            if not (download and nltk.download(name, quiet=True)):
+                missing.append(name)
+    return missing
+
+def get_wordnet():
+    """Return the WordNet corpus reader, loading it on first use
+
+    If the data is missing it is downloaded once into NLTK_DOWNLOAD_DIR. When
+    that fails too the LookupError is remembered and raised straight away on
+    every later call, rather than searching the NLTK data path again.
+    """
+    global _wordnet, _wordnet_error
+    if _wordnet is None:
+        with _nltk_lock:
+            if _wordnet_error is not None:
+                raise LookupError(_wordnet_error)
+            if _wordnet is None:
+                import nltk
+                from nltk.corpus import wordnet
+                try:
+                    # Any attribute access makes the lazy corpus loader read the data
+                    wordnet.get_version()
+                except LookupError:
+                    app.logger.warning("WordNet data is not installed; downloading it to %s", NLTK_DOWNLOAD_DIR)
+                    if NLTK_DOWNLOAD_DIR not in nltk.data.path:
+                        nltk.data.path.append(NLTK_DOWNLOAD_DIR)
+                    try:
+                        if not nltk.download('wordnet', download_dir=NLTK_DOWNLOAD_DIR, quiet=True):
+                            raise LookupError("nltk.download reported a failure")
+                        wordnet.get_version()
+                    except Exception as e:
+                        _wordnet_error = f"WordNet data is not installed and could not be downloaded: {e}"
+                        raise LookupError(_wordnet_error)
+                _wordnet = wordnet
+    return _wordnet
+
+def warm_up():
+    """Load NLTK and WordNet ahead of the first request"""
+    started = time.perf_counter()
+    try:
+        get_wordnet().synsets('warm')
+    except LookupError:
+        app.logger.warning("WordNet data is not installed; definitions will fall back to placeholders")
+    STARTUP_STATS['warm_up_seconds'] = time.perf_counter() - started
+    app.logger.info("NLTK warm-up took %.3fs", STARTUP_STATS['warm_up_seconds'])
+
+class _NullTimer:
+    def __enter__(self):
+        return self
     
-    def can_place_word(self, word, row, col, direction):
-        """Check if a word can be placed at the given position"""
-        if direction == 'horizontal':
-            if col + len(word) > len(self.grid[0]):
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class _StageTimer:
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.metrics.observe_stage(self.stage, time.perf_counter() - self.started)
+        return False
+
+class Metrics:
+    """Histograms of stage timings and layout attempts, in Prometheus text format
+
+    Disabled (the default), every method returns straight away. Stage
+    timings are also summed per request while a request is being tracked
+    (see start_request), for the Server-Timing header. Attempts that run in
+    the process pool are not seen by the web worker's metrics.
+
+    Every process keeps its own series, so each one is labelled with the
+    pid of the worker that rendered it; sum over pid to aggregate workers.
+    """
+    
+    HISTOGRAMS = {
+        'crossword_stage_seconds': (
+            "Seconds spent per call in each scraping and generation stage",
+            (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60)),
+        'crossword_attempt_words': (
+            "Words placed by each greedy layout attempt",
+            (1, 2, 5, 10, 15, 20, 30, 40, 50)),
+        'crossword_attempt_score': (
+            "Score of each greedy layout attempt",
+            (0, 50, 100, 200, 400, 800, 1600)),
+        'crossword_skipped_words': (
+            "Word checks skipped by each layout attempt or search because the word "
+            "shares no letter with the open cells of the grid",
+            (0, 1, 5, 10, 50, 100, 500, 1000)),
+        'crossword_search_nodes': (
+            "Nodes visited by each backtracking search",
+            (10, 100, 1000, 5000, 10000, 50000)),
+        'crossword_puzzle_score': (
+            "Score of each generated puzzle",
+            (0, 50, 100, 200, 400, 800, 1600)),
+    }
+    
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        # (name, stage) -> [count per bucket..., count, sum]
+        self._series = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+    
+    def observe(self, name, value, stage=None):
+        """Record a value in one of the HISTOGRAMS"""
+        if not self.enabled:
+            return
+        buckets = self.HISTOGRAMS[name][1]
+        with self._lock:
+            series = self._series.get((name, stage))
+            if series is None:
+                series = self._series[name, stage] = [0] * (len(buckets) + 2)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+    
+    def observe_stage(self, stage, seconds):
+        """Record the time one call spent in a stage"""
+        if not self.enabled:
+            return
+        self.observe('crossword_stage_seconds', seconds, stage)
+        timings = getattr(self._local, 'timings', None)
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0) + seconds
+    
+    def stage(self, stage):
+        """Context manager timing a block as one call of a stage"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, stage)
+    
+    def start_request(self):
+        """Start summing stage timings for the current thread's request"""
+        if self.enabled:
+            self._local.timings = {}
+    
+    def finish_request(self):
+        """Stop tracking the request, returning its stage -> seconds"""
+        timings = getattr(self._local, 'timings', None)
+        self._local.timings = None
+        return timings or {}
+    
+    def render(self):
+        """All series in the Prometheus text exposition format"""
+        with self._lock:
+            series = {key: values[:] for key, values in self._series.items()}
+        pid = f'pid="{os.getpid()}"'
+        lines = []
+        for name, (help_text, buckets) in self.HISTOGRAMS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (series_name, stage), values in sorted(series.items(), key=lambda item: str(item[0])):
+                if series_name != name:
+                    continue
+                labels = f'{pid},stage="{stage}"' if stage is not None else pid
+                for bound, count in zip(buckets, values):
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {values[-2]}')
+                lines.append(f"{name}_sum{{{labels}}} {values[-1]}")
+                lines.append(f"{name}_count{{{labels}}} {values[-2]}")
+        return "\n".join(lines) + "\n"
+
+# Set CROSSWORD_METRICS=1 to serve /metrics, CROSSWORD_SERVER_TIMING=1 to add
+# a Server-Timing header to responses; either turns the timers on
+SERVER_TIMING = os.environ.get('CROSSWORD_SERVER_TIMING') == '1'
+metrics = Metrics(enabled=os.environ.get('CROSSWORD_METRICS') == '1' or SERVER_TIMING)
+
+EMPTY_CELL = ord(' ')
+
+class Direction(IntEnum):
+    """Direction of a word, valued as the per-cell bit recording which words
+    run through a cell"""
+    HORIZONTAL = 1
+    VERTICAL = 2
+    
+    @property
+    def label(self):
+        """Name used in puzzle dicts ('horizontal' or 'vertical')"""
+        return self.name.lower()
+
+# Enum attribute lookups are slow in the placement loops, so those use these
+HORIZONTAL = Direction.HORIZONTAL
+VERTICAL = Direction.VERTICAL
+
+# One bit per letter A-Z, for letter signatures of words and grids, and
+# one bit shared by every other letter
+LETTER_BITS = {chr(ord('A') + i): 1 << i for i in range(26)}
+OTHER_LETTER_BIT = 1 << 26
+
+def letter_signature(word):
+    """Mask of the letters in an upper-case word"""
+    signature = 0
+    for letter in word:
+        signature |= LETTER_BITS.get(letter, OTHER_LETTER_BIT)
+    return signature
+
+# Translation tables mapping empty cells to 0x00 and letters to 0xFF, and
+# the reverse
+_FILLED_MASK = bytes(0 if b == EMPTY_CELL else 0xFF for b in range(256))
+_EMPTY_MASK = bytes(0xFF if b == EMPTY_CELL else 0 for b in range(256))
+
+# Translation tables setting a direction bit on every cell of a slice
+_ADD_DIRECTION = {bit: bytes(b | bit for b in range(256)) for bit in Direction}
+
+class ByteGrid:
+    """Square letter grid stored row-major in a flat bytearray
+
+    Next to the letters, ``dirs`` keeps the direction bits of the words
+    running through each cell, so the crossword adjacency rules can be
+    checked from a handful of slices without rescanning the grid.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._blank = b' ' * (size * size)
+        self._no_dirs = bytes(size * size)
+        self.cells = bytearray(self._blank)
+        self.dirs = bytearray(self._no_dirs)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, row):
+        """Return a row as a list of single-character strings"""
+        start = row * self.size
+        return list(bytes(self.cells[start:start + self.size]).decode('latin-1'))
+
+    def __iter__(self):
+        for row in range(self.size):
+            yield self[row]
+
+    def span(self, length, row, col, direction):
+        """Return the slice of cells covered by a word, or None if off the grid"""
+        if row < 0 or col < 0:
+            return None
+        if direction == HORIZONTAL:
+            if row >= self.size or col + length > self.size:
+                return None
+            start = row * self.size + col
+            return slice(start, start + length)
+        if col >= self.size or row + length > self.size:
+            return None
+        start = row * self.size + col
+        return slice(start, start + (length - 1) * self.size + 1, self.size)
+
+    def neighbours(self, length, row, col, direction):
+        """Return the cells just before and after a word, and the slices of
+        cells running alongside it on either side"""
+        size = self.size
+        start = row * size + col
+        if direction == HORIZONTAL:
+            step, side, position, side_position = 1, size, col, row
+        else:
+            step, side, position, side_position = size, 1, row, col
+        ends = []
+        if position > 0:
+            ends.append(start - step)
+        if position + length < size:
+            ends.append(start + length * step)
+        stop = start + (length - 1) * step + 1
+        sides = []
+        if side_position > 0:
+            sides.append(slice(start - side, stop - side, step))
+        if side_position < size - 1:
+            sides.append(slice(start + side, stop + side, step))
+        return ends, sides
+
+    def fits(self, word, row, col, direction):
+        """Check an encoded word against the grid and the adjacency rules
+
+        Occupied cells must hold the same letter and belong to a word running
+        the other way; the cells beyond both ends must be empty; and new
+        letters may not touch letters on either side.
+        """
+        cells = self.span(len(word), row, col, direction)
+        if cells is None:
+            return False
+        current = self.cells[cells]
+        filled = int.from_bytes(current.translate(_FILLED_MASK), 'big')
+        # XOR leaves zero bytes where letters agree; the mask ignores empty cells
+        if (int.from_bytes(current, 'big') ^ int.from_bytes(word, 'big')) & filled:
+            return False
+        if int.from_bytes(self.dirs[cells], 'big') & int.from_bytes(bytes([direction]) * len(word), 'big'):
+            return False
+        ends, sides = self.neighbours(len(word), row, col, direction)
+        for end in ends:
+            if self.cells[end] != EMPTY_CELL:
                 return False
-            for i, letter in enumerate(word):
-                if self.grid[row][col + i] != ' ' and self.grid[row][col + i] != letter:
-                    return False
-        else:  # vertical
-            if row + len(word) > len(self.grid):
+        empty = int.from_bytes(current.translate(_EMPTY_MASK), 'big')
+        for side in sides:
+            if int.from_bytes(self.cells[side].translate(_FILLED_MASK), 'big') & empty:
+                return False
+        return True
+
+    def place(self, word, row, col, direction):
+        """Write an encoded word into the grid and return the state it replaced"""
+        cells = self.span(len(word), row, col, direction)
+        previous = (bytes(self.cells[cells]), bytes(self.dirs[cells]))
+        self.cells[cells] = word
+        self.dirs[cells] = previous[1].translate(_ADD_DIRECTION[direction])
+        return previous
+
+    def restore(self, previous, row, col, direction):
+        """Put back the state returned by place"""
+        letters, dirs = previous
+        cells = self.span(len(letters), row, col, direction)
+        self.cells[cells] = letters
+        self.dirs[cells] = dirs
+
+    def clear(self):
+        """Empty every cell, reusing the existing buffers"""
+        self.cells[:] = self._blank
+        self.dirs[:] = self._no_dirs
+
+    def filled_count(self):
+        return len(self.cells) - self.cells.count(EMPTY_CELL)
+
+    def snapshot(self):
+        """Return an immutable copy of the cells"""
+        return bytes(self.cells)
+
+    def to_rows(self, snapshot=None):
+        """Convert the grid (or a snapshot of it) to a list of lists"""
+        data = self.snapshot() if snapshot is None else snapshot
+        text = data.decode('latin-1')
+        return [list(text[start:start + self.size])
+                for start in range(0, len(text), self.size)]
+
+class NumpyGrid(ByteGrid):
+    """Square letter grid stored in flat NumPy uint8 arrays"""
+
+    def __init__(self, size):
+        self.size = size
+        self.cells = np.full(size * size, EMPTY_CELL, dtype=np.uint8)
+        self.dirs = np.zeros(size * size, dtype=np.uint8)
+
+    def __getitem__(self, row):
+        start = row * self.size
+        return list(self.cells[start:start + self.size].tobytes().decode('latin-1'))
+
+    def fits(self, word, row, col, direction):
+        cells = self.span(len(word), row, col, direction)
+        if cells is None:
+            return False
+        current = self.cells[cells]
+        letters = np.frombuffer(word, dtype=np.uint8)
+        filled = current != EMPTY_CELL
+        if np.any(filled & (current != letters)):
+            return False
+        if np.any(self.dirs[cells] & int(direction)):
+            return False
+        ends, sides = self.neighbours(len(word), row, col, direction)
+        for end in ends:
+            if self.cells[end] != EMPTY_CELL:
+                return False
+        for side in sides:
+            if np.any(~filled & (self.cells[side] != EMPTY_CELL)):
                 return False
-            for i, letter in enumerate(word):
-                if self.grid[row + i][col] != ' ' and self.grid[row + i][col] != letter:
-                    return False
         return True
+
+    def place(self, word, row, col, direction):
+        cells = self.span(len(word), row, col, direction)
+        previous = (self.cells[cells].tobytes(), self.dirs[cells].tobytes())
+        self.cells[cells] = np.frombuffer(word, dtype=np.uint8)
+        self.dirs[cells] |= int(direction)
+        return previous
+
+    def restore(self, previous, row, col, direction):
+        letters, dirs = previous
+        cells = self.span(len(letters), row, col, direction)
+        self.cells[cells] = np.frombuffer(letters, dtype=np.uint8)
+        self.dirs[cells] = np.frombuffer(dirs, dtype=np.uint8)
+
+    def clear(self):
+        self.cells.fill(EMPTY_CELL)
+        self.dirs.fill(0)
+
+    def filled_count(self):
+        return int(np.count_nonzero(self.cells != EMPTY_CELL))
+
+    def snapshot(self):
+        return self.cells.tobytes()
+
+GRID_BACKENDS = {'bytearray': ByteGrid}
+if np is not None:
+    GRID_BACKENDS['numpy'] = NumpyGrid
+
+LAYOUT_ENGINES = ('greedy', 'backtrack')
+
+def _generate_attempts(words_with_definitions, deadline, max_attempts, target_score, seed, options):
+    """Run a share of the attempt budget inside a worker process"""
+    time_limit = deadline - time.time()
+    if time_limit <= 0:
+        return None
+    generator = CrosswordGenerator(**options)
+    return generator.generate_crossword(words_with_definitions, time_limit=time_limit,
+                                        max_attempts=max_attempts, target_score=target_score, seed=seed)
+
+def _generate_batch_item(words_with_definitions, time_limit, max_attempts, options, seed=None):
+    """Generate one batch puzzle inside a worker process"""
+    generator = CrosswordGenerator(**options)
+    return generator.generate_crossword(words_with_definitions, time_limit=time_limit,
+                                        max_attempts=max_attempts, seed=seed)
+
+class Placement:
+    """A word placed on the grid
+
+    Layouts keep these while generating; crop_puzzle turns them into the
+    dicts sent to clients.
+    """
+    __slots__ = ('word', 'row', 'col', 'direction', 'definition')
+    
+    def __init__(self, word, row, col, direction, definition):
+        self.word = word
+        self.row = row
+        self.col = col
+        self.direction = direction
+        self.definition = definition
+    
+    def to_dict(self, row_offset=0, col_offset=0):
+        """The JSON-facing position, shifted by the given offsets"""
+        return {
+            'word': self.word,
+            'row': self.row - row_offset,
+            'col': self.col - col_offset,
+            'direction': self.direction.label,
+            'definition': self.definition
+        }
+
+class CrossingTable:
+    """Letters shared by every pair of words in a word list
+
+    pairs[i][j] lists (offset in word i, offset in word j) for each way
+    word i can cross word j. The table is built once per word list and
+    shared by all of its layout attempts.
+    """
+    
+    def __init__(self, words):
+        self.words = words
+        self.signatures = [letter_signature(word) for word in words]
+        offsets = []
+        for word in words:
+            letters = defaultdict(list)
+            for k, letter in enumerate(word):
+                letters[letter].append(k)
+            offsets.append(letters)
+        
+        self.pairs = [[()] * len(words) for _ in words]
+        for i in range(len(words)):
+            for j in range(i + 1, len(words)):
+                shared = tuple((a, b) for letter, mine in offsets[i].items()
+                               for a in mine for b in offsets[j].get(letter, ()))
+                self.pairs[i][j] = shared
+                self.pairs[j][i] = tuple((b, a) for a, b in shared)
+    
+    def count(self, i, j):
+        """Number of ways word i can cross word j"""
+        return len(self.pairs[i][j])
     
-    def place_word(self, word, row, col, direction):
-        """Place a word on the grid"""
-        if direction == 'horizontal':
-            for i, letter in enumerate(word):
-                self.grid[row][col + i] = letter
-        else:  # vertical
-            for i, letter in enumerate(word):
-                self.grid[row + i][col] = letter
+    def candidates(self, i, placed):
+        """Map each placement of word i crossing the placed words to the
+        number of crossings it makes
+
+        placed holds (index, row, col, direction) of the words on the grid.
+        """
+        counts = {}
+        for j, row, col, direction in placed:
+            for a, b in self.pairs[i][j]:
+                if direction == HORIZONTAL:
+                    candidate = (row - a, col + b, VERTICAL)
+                else:
+                    candidate = (row + b, col - a, HORIZONTAL)
+                if candidate[0] >= 0 and candidate[1] >= 0:
+                    counts[candidate] = counts.get(candidate, 0) + 1
+        return counts
+
+class Layout:
+    """One crossword being built: its grid, placed words and running totals
+
+    Everything generation mutates lives here rather than on the generator,
+    so concurrent generations never share state. Layouts are recycled
+    through a LayoutPool; reset() starts one over, keeping its grid when the
+    size has not changed.
+    """
+    
+    def __init__(self, grid_backend='bytearray'):
+        self.grid_backend = grid_backend
+        self.grid = None
+        self.size = 0
+        # Placement of each word, in the order they were added
+        self.positions = []
+        # letter -> {(row, col): direction of the word occupying that cell}
+        self.letter_cells = defaultdict(dict)
+        # Letter signature of the cells above that a new word can still cross
+        self.letter_mask = 0
+        # Grid bytes (128-255) standing for letters outside ASCII
+        self.letter_codes = {}
+        self.rng = random.Random()
+        self.reset_stats()
+    
+    def reset(self, size):
+        """Start a fresh layout on an empty grid of the given size"""
+        if self.grid is None or self.size != size:
+            self.grid = GRID_BACKENDS[self.grid_backend](size)
+            self.size = size
+        else:
+            self.grid.clear()
+        self.positions = []
+        self.letter_cells.clear()
+        self.letter_mask = 0
+        self.letter_codes = {}
+        self.reset_stats()
+    
+    def reset_stats(self):
+        """Clear the running totals that place_word keeps for scoring"""
+        self.invalid_words = 0
+        self.word_count = 0
+        self.total_length = 0
+        self.filled_cells = 0
+        # (min_row, min_col, max_row, max_col) of the placed words
+        self.bbox = None
+        # Words passed over by can_cross
+        self.skipped_words = 0
+    
+    def encode(self, word):
+        """Grid bytes for a word, or None when the layout has run out of
+        codes for letters outside ASCII"""
+        try:
+            return word.encode('ascii')
+        except UnicodeEncodeError:
+            pass
+        data = bytearray()
+        for letter in word:
+            code = ord(letter)
+            if code >= 128:
+                code = self.letter_codes.get(letter)
+                if code is None:
+                    if len(self.letter_codes) >= 128:
+                        return None
+                    code = self.letter_codes[letter] = 128 + len(self.letter_codes)
+            data.append(code)
+        return bytes(data)
+    
+    def can_place_word(self, word, row, col, direction):
+        """Check if a word can be placed at the given position"""
+        data = self.encode(word)
+        if data is None:
+            return False
+        return self.grid.fits(data, row, col, direction)
+    
+    def place_word(self, word, row, col, direction, validate=True):
+        """Place a word on the grid and return what is needed to undo it
+
+        Placements that break the adjacency rules are counted in
+        invalid_words, which zeroes the puzzle score. Callers that already
+        checked can_place_word pass validate=False.
+        """
+        data = self.encode(word)
+        invalid = validate and not self.grid.fits(data, row, col, direction)
+        self.invalid_words += invalid
+        previous = self.grid.place(data, row, col, direction)
+        
+        # Update the running totals used by calculate_puzzle_score
+        old_bbox = self.bbox
+        self.bbox = self.bbox_with(len(word), row, col, direction)
+        new_cells = previous[0].count(EMPTY_CELL)
+        self.filled_cells += new_cells
+        self.word_count += 1
+        self.total_length += len(word)
+        
+        index_changes = []
+        for i, letter in enumerate(word):
+            if direction == HORIZONTAL:
+                cell = (row, col + i)
+            else:  # vertical
+                cell = (row + i, col)
+
+            # Keep the letter index up to date. A cell that is already
+            # crossed by two words cannot host another crossing.
+            cells = self.letter_cells[letter]
+            if cell in cells:
+                if cells[cell] != direction:
+                    index_changes.append((letter, cell, cells.pop(cell)))
+                    # The bit shared by letters outside A-Z stays set
+                    if not cells:
+                        self.letter_mask &= ~LETTER_BITS.get(letter, 0)
+            else:
+                cells[cell] = direction
+                index_changes.append((letter, cell, None))
+                self.letter_mask |= LETTER_BITS.get(letter, OTHER_LETTER_BIT)
+        return previous, index_changes, invalid, new_cells, old_bbox
+    
+    def unplace_word(self, word, row, col, direction, undo):
+        """Revert a placement made by place_word"""
+        previous, index_changes, invalid, new_cells, old_bbox = undo
+        self.invalid_words -= invalid
+        self.filled_cells -= new_cells
+        self.word_count -= 1
+        self.total_length -= len(word)
+        self.bbox = old_bbox
+        self.grid.restore(previous, row, col, direction)
+        for letter, cell, old_direction in reversed(index_changes):
+            cells = self.letter_cells[letter]
+            if old_direction is None:
+                del cells[cell]
+                if not cells:
+                    self.letter_mask &= ~LETTER_BITS.get(letter, 0)
+            else:
+                cells[cell] = old_direction
+                self.letter_mask |= LETTER_BITS.get(letter, OTHER_LETTER_BIT)
+    
+    def bbox_with(self, length, row, col, direction):
+        """Return the bounding box of the layout after adding a word"""
+        if direction == HORIZONTAL:
+            end_row, end_col = row, col + length - 1
+        else:
+            end_row, end_col = row + length - 1, col
+        if self.bbox is None:
+            return (row, col, end_row, end_col)
+        min_row, min_col, max_row, max_col = self.bbox
+        return (min(min_row, row), min(min_col, col), max(max_row, end_row), max(max_col, end_col))
+    
+    @staticmethod
+    def bbox_area(bbox):
+        min_row, min_col, max_row, max_col = bbox
+        return (max_row - min_row + 1) * (max_col - min_col + 1)
+    
+    def bbox_density(self):
+        """Share of the cells inside the bounding box that hold a letter"""
+        if self.bbox is None:
+            return 0
+        return self.filled_cells / self.bbox_area(self.bbox)
+    
+    def layout_key(self):
+        """Sort key for comparing layouts: score, then compactness"""
+        return (self.calculate_puzzle_score(), self.bbox_density())
+    
+    def add_word(self, word_data, word, row, col, direction):
+        """Place a word that passed can_place_word and record it in the layout"""
+        undo = self.place_word(word, row, col, direction, validate=False)
+        self.positions.append(Placement(word, row, col, direction, word_data['definition']))
+        return undo
+    
+    def remove_last_word(self, undo):
+        """Take back the word most recently added to the layout"""
+        placement = self.positions.pop()
+        self.unplace_word(placement.word, placement.row, placement.col, placement.direction, undo)
+    
+    def can_cross(self, signature):
+        """Whether a word with this letter signature could cross the layout
+
+        Counts the words ruled out in skipped_words.
+        """
+        if signature & self.letter_mask:
+            return True
+        self.skipped_words += 1
+        return False
     
     def get_intersections(self, word):
         """Get all possible intersection points for a word"""
         intersections = []
-        for pos in self.positions:
-            existing_word = pos['word']
-            for i, letter1 in enumerate(word):
-                for j, letter2 in enumerate(existing_word):
-                    if letter1 == letter2:
-                        if pos['direction'] == 'horizontal':
-                            # Try placing new word vertically
-                            new_row = pos['row'] + j
-                            new_col = pos['col'] - i
-                            if new_row >= 0 and new_col >= 0:
-                                intersections.append((new_row, new_col, 'vertical'))
-                        else:
-                            # Try placing new word horizontally
-                            new_row = pos['row'] - i
-                            new_col = pos['col'] + j
-                            if new_row >= 0 and new_col >= 0:
-                                intersections.append((new_row, new_col, 'horizontal'))
+        seen = set()
+        for i, letter in enumerate(word):
+            cells = self.letter_cells.get(letter)
+            if not cells:
+                continue
+            for (row, col), direction in cells.items():
+                if direction == HORIZONTAL:
+                    # Cross the existing word vertically
+                    candidate = (row - i, col, VERTICAL)
+                else:
+                    # Cross the existing word horizontally
+                    candidate = (row, col - i, HORIZONTAL)
+                if candidate[0] >= 0 and candidate[1] >= 0 and candidate not in seen:
+                    seen.add(candidate)
+                    intersections.append(candidate)
         return intersections
     
-    def generate_crossword(self, words_with_definitions, time_limit=60):
-        """Generate a crossword puzzle within the time limit"""
+    def snapshot_puzzle(self, score):
+        """Capture the current layout as a snapshot puzzle
+
+        The grid is kept as bytes and the placements as they are; only the
+        puzzle that is returned gets expanded, by crop_puzzle.
+        """
+        return {
+            'grid': self.grid.snapshot(),
+            'bbox': self.bbox,
+            'positions': self.positions[:],
+            'letters': {code: letter for letter, code in self.letter_codes.items()},
+            'score': score
+        }
+    
+    def calculate_puzzle_score(self):
+        """Calculate a score for the puzzle quality"""
+        # Layouts that break the adjacency rules are not valid crosswords
+        if not self.word_count or self.invalid_words:
+            return 0
+        
+        # Filled cells, word count and total length are kept up to date by
+        # place_word, so scoring does not touch the grid
+        total_cells = self.grid.size * self.grid.size
+        density = self.filled_cells / total_cells
+        
+        # Bonus for more words
+        word_bonus = self.word_count * 10
+        
+        # Bonus for longer words
+        length_bonus = self.total_length
+        
+        # Penalty for empty space
+        empty_penalty = (1 - density) * 100
+        
+        return word_bonus + length_bonus - empty_penalty
+
+class LayoutPool:
+    """Idle layouts kept for reuse, so each attempt does not allocate a new grid"""
+    
+    def __init__(self, max_idle=8):
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+    
+    def acquire(self, grid_backend, size, seed=None):
+        """Take an empty layout of the given size, seeding its random numbers"""
+        with self._lock:
+            layout = None
+            for i, idle in enumerate(self._idle):
+                if idle.grid_backend == grid_backend:
+                    layout = self._idle.pop(i)
+                    break
+        if layout is None:
+            layout = Layout(grid_backend)
+        layout.reset(size)
+        layout.rng.seed(seed)
+        return layout
+    
+    def release(self, layout):
+        """Hand a layout back once nothing refers to its grid any more"""
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(layout)
+    
+    @contextmanager
+    def borrow(self, grid_backend, size, seed=None):
+        layout = self.acquire(grid_backend, size, seed)
+        try:
+            yield layout
+        finally:
+            self.release(layout)
+
+class CrosswordGenerator:
+    def __init__(self, grid_backend='bytearray', workers=1, attempts_per_task=10,
+                 engine='greedy', node_budget=5000, branch_limit=6, max_size=30):
+        if grid_backend not in GRID_BACKENDS:
+            raise ValueError(f"Unknown grid backend: {grid_backend}")
+        if engine not in LAYOUT_ENGINES:
+            raise ValueError(f"Unknown layout engine: {engine}")
+        self.grid_backend = grid_backend
+        self.engine = engine
+        # Limits for the backtracking engine: search nodes in total and
+        # candidate placements tried per word
+        self.node_budget = node_budget
+        self.branch_limit = branch_limit
+        # With more than one worker, attempts are spread over a process pool
+        self.workers = workers
+        self.attempts_per_task = attempts_per_task
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        # The grid is sized from the word list (see choose_grid_size),
+        # never larger than max_size
+        self.max_size = max_size
+        # Generation state lives in Layout objects borrowed per call, so one
+        # generator can serve several threads at once
+        self.layouts = LayoutPool()
+        
+    def create_grid(self, size):
+        """Create an empty grid"""
+        return GRID_BACKENDS[self.grid_backend](size)
+    
+    def new_layout(self, size, seed=None):
+        """Return an empty layout for working outside of generate_crossword"""
+        layout = Layout(self.grid_backend)
+        layout.reset(size)
+        layout.rng.seed(seed)
+        return layout
+    
+    def worker_options(self):
+        """Settings for building an equivalent single-process generator"""
+        return {
+            'grid_backend': self.grid_backend,
+            'engine': self.engine,
+            'node_budget': self.node_budget,
+            'branch_limit': self.branch_limit,
+            'max_size': self.max_size,
+        }
+    
+    def get_executor(self):
+        """Return the shared process pool, starting it on first use"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+    
+    def generate_crossword(self, words_with_definitions, time_limit=60, max_attempts=100, target_score=None, seed=None):
+        """Generate a crossword puzzle within the time limit
+
+        Runs with the same seed and an attempt budget that is used up before
+        the time limit produce the same puzzle.
+        """
+        with metrics.stage('layout'):
+            if self.workers > 1:
+                best_puzzle = self.generate_crossword_parallel(words_with_definitions, time_limit,
+                                                               max_attempts, target_score, seed)
+            else:
+                best_puzzle = None
+                for best_puzzle in self.iter_layouts(words_with_definitions, time_limit, max_attempts,
+                                                     target_score, seed):
+                    pass
+                if best_puzzle:
+                    best_puzzle = self.crop_puzzle(best_puzzle)
+        
+        if best_puzzle:
+            metrics.observe('crossword_puzzle_score', best_puzzle['score'])
+        return best_puzzle
+    
+    def iter_crossword(self, words_with_definitions, time_limit=60, max_attempts=100, target_score=None, seed=None):
+        """Yield each improved puzzle as soon as it is found
+
+        The last puzzle yielded is the one generate_crossword would return.
+        Closing the iterator stops generation.
+        """
+        if self.workers > 1:
+            yield from self.iter_crossword_parallel(words_with_definitions, time_limit,
+                                                    max_attempts, target_score, seed)
+            return
+        
+        for puzzle in self.iter_layouts(words_with_definitions, time_limit, max_attempts, target_score, seed):
+            yield self.crop_puzzle(puzzle)
+    
+    def iter_layouts(self, words_with_definitions, time_limit=60, max_attempts=100, target_score=None, seed=None):
+        """Yield a snapshot puzzle (see snapshot_puzzle) for each improved layout"""
         start_time = time.time()
-        best_puzzle = None
-        best_score = 0
         
         # Sort words by length (longer words first for better placement)
         sorted_words = sorted(words_with_definitions, key=lambda x: len(x['word']), reverse=True)
+        size = self.choose_grid_size(sorted_words)
         
-        attempts = 0
-        max_attempts = 100
-        
-        while time.time() - start_time < time_limit and attempts < max_attempts:
-            attempts += 1
+        with self.layouts.borrow(self.grid_backend, size, seed) as layout:
+            if self.engine == 'backtrack':
+                yield from self.search_layout(layout, sorted_words, start_time + time_limit, target_score)
+                return
+            
+            crossings = CrossingTable([word_data['word'].upper() for word_data in sorted_words])
+            best_key = (0, 0)
+            attempts = 0
             
-            # Create new grid
-            self.grid = self.create_grid(self.max_size)
-            self.positions = []
-            self.words = []
+            while time.time() - start_time < time_limit and attempts < max_attempts:
+                if target_score is not None and best_key[0] >= target_score:
+                    break
+                attempts += 1
+                
+                self.layout_greedy(layout, sorted_words, crossings)
+                
+                # Score this puzzle, breaking ties on bounding-box density
+                key = layout.layout_key()
+                metrics.observe('crossword_attempt_words', len(layout.positions))
+                metrics.observe('crossword_skipped_words', layout.skipped_words)
+                metrics.observe('crossword_attempt_score', key[0])
+                
+                if key[0] > 0 and key > best_key:
+                    best_key = key
+                    yield layout.snapshot_puzzle(key[0])
+    
+    def choose_grid_size(self, sorted_words):
+        """Pick a grid size from the total length of the word list
+
+        Room for about two and a half times the letters keeps the layout
+        from running out of space, and the grid is never smaller than the
+        longest word that fits under max_size.
+        """
+        lengths = [len(word_data['word']) for word_data in sorted_words
+                   if len(word_data['word']) <= self.max_size]
+        if not lengths:
+            return self.max_size
+        size = math.ceil(math.sqrt(sum(lengths) * 2.5))
+        return max(lengths[0], min(size, self.max_size))
+    
+    def crop_puzzle(self, puzzle):
+        """Crop a snapshot puzzle to the bounding box of its words
+
+        Only the rows and columns inside the box are expanded to the
+        list-of-lists grid, and the placements become word position dicts
+        shifted to match, plus the across and down clues.
+        """
+        min_row, min_col, max_row, max_col = puzzle.pop('bbox')
+        cells = puzzle['grid'].decode('latin-1')
+        size = math.isqrt(len(cells))
+        placements = puzzle['positions']
+        if puzzle['letters']:
+            cells = cells.translate(puzzle['letters'])
+        
+        # Separate across and down clues
+        across_clues = []
+        down_clues = []
+        for i, placement in enumerate(placements):
+            clue_data = {
+                'number': i + 1,
+                'definition': placement.definition
+            }
+            if placement.direction == HORIZONTAL:
+                across_clues.append(clue_data)
+            else:
+                down_clues.append(clue_data)
+        
+        return {
+            'grid': [list(cells[row * size + min_col:row * size + max_col + 1])
+                     for row in range(min_row, max_row + 1)],
+            'words': [placement.word for placement in placements],
+            'positions': [placement.to_dict(min_row, min_col) for placement in placements],
+            'score': puzzle['score'],
+            'across_clues': across_clues,
+            'down_clues': down_clues
+        }
+    
+    def place_first_word(self, layout, sorted_words):
+        """Start a new layout with the first word that fits across the centre
+        of the grid, returning its index in sorted_words (None if none fits)"""
+        layout.reset(layout.size)
+        
+        center_row = layout.size // 2
+        center_col = layout.size // 2
+        
+        for index, first_word in enumerate(sorted_words):
+            word = first_word['word'].upper()
+            if len(word) <= layout.size:
+                start_col = center_col - len(word) // 2
+                if layout.can_place_word(word, center_row, start_col, HORIZONTAL):
+                    layout.add_word(first_word, word, center_row, start_col, HORIZONTAL)
+                    return index
+        return None
+    
+    def layout_greedy(self, layout, sorted_words, crossings=None):
+        """Build one layout best-first
+
+        The next word is the one with the most ways to cross the placed
+        words, according to the crossing table, and it goes where it makes
+        the most crossings. Ties are broken at random, so attempts differ.
+        """
+        if crossings is None:
+            crossings = CrossingTable([word_data['word'].upper() for word_data in sorted_words])
+        start = self.place_first_word(layout, sorted_words)
+        size = layout.size
+        words = crossings.words
+        
+        # (index, row, col, direction) of each word on the grid
+        placed = []
+        if start is not None:
+            first = layout.positions[0]
+            placed.append((start, first.row, first.col, first.direction))
+        remaining = [i for i in range(len(words)) if i != start and len(words[i]) <= size]
+        # Ways each word can cross the placed words
+        options = {i: crossings.count(i, start) if placed else 0 for i in remaining}
+        # A word that found no valid placement is retried once a word it
+        # can cross is added, and only against the words added since: a
+        # placement that was blocked stays blocked as the grid fills up
+        checked = {}
+        blocked = set()
+        # Crossings made by each placement checked so far, per word
+        crossing_counts = {}
+        
+        def add(i, row, col, direction):
+            layout.add_word(sorted_words[i], words[i], row, col, direction)
+            placed.append((i, row, col, direction))
+            remaining.remove(i)
+            for k in remaining:
+                crossing = crossings.count(k, i)
+                if crossing:
+                    options[k] += crossing
+                    blocked.discard(k)
+        
+        while remaining:
+            ready = [i for i in remaining if options[i] and i not in blocked
+                     and layout.can_cross(crossings.signatures[i])]
+            if ready:
+                i = max(ready, key=lambda i: (options[i], layout.rng.random()))
+                word = words[i]
+                new = crossings.candidates(i, placed[checked.get(i, 0):])
+                counts = crossing_counts.setdefault(i, {})
+                for candidate, crossing in new.items():
+                    counts[candidate] = counts.get(candidate, 0) + crossing
+                candidates = sorted(new, key=lambda candidate: (-counts[candidate], layout.rng.random()))
+                # Only check placements until the best valid one
+                best = next((candidate for candidate in candidates
+                             if layout.can_place_word(word, *candidate)), None)
+                if best is None:
+                    checked[i] = len(placed)
+                    blocked.add(i)
+                else:
+                    add(i, *best)
+                continue
             
-            center_row = self.max_size // 2
-            center_col = self.max_size // 2
+            # Nothing left can cross the layout, so start the first few
+            # words at random spots
+            if len(layout.positions) >= 3:
+                break
+            i = remaining[0]
+            word = words[i]
+            for _ in range(10):
+                row = layout.rng.randint(0, size - len(word))
+                col = layout.rng.randint(0, size - len(word))
+                direction = layout.rng.choice((HORIZONTAL, VERTICAL))
+                
+                if layout.can_place_word(word, row, col, direction):
+                    add(i, row, col, direction)
+                    break
+            else:
+                remaining.remove(i)
+    
+    def search_layout(self, layout, sorted_words, deadline, target_score=None):
+        """Backtracking search within a node budget, yielding a snapshot
+        puzzle for each improved layout"""
+        start = self.place_first_word(layout, sorted_words)
+        if start is None:
+            return
+        remaining = [(word_data, word_data['word'].upper())
+                     for i, word_data in enumerate(sorted_words)
+                     if i != start and len(word_data['word']) <= layout.size]
+        remaining = [(word_data, word, letter_signature(word)) for word_data, word in remaining]
+        
+        # Upper bound on the score a single letter can add (word length
+        # bonus plus the density term of calculate_puzzle_score)
+        letter_value = 1 + 100 / (layout.size * layout.size)
+        best_key = (0, 0)
+        nodes = 0
+        
+        def search(remaining):
+            nonlocal best_key, nodes
+            nodes += 1
+            key = layout.layout_key()
+            score = key[0]
+            if score > 0 and key > best_key:
+                best_key = key
+                yield layout.snapshot_puzzle(score)
+            if nodes >= self.node_budget or time.time() >= deadline:
+                return False
+            if target_score is not None and best_key[0] >= target_score:
+                return False
             
-            # Place first word in center
-            if sorted_words:
-                first_word = sorted_words[0]
-                word = first_word['word'].upper()
-                if len(word) <= self.max_size:
-                    start_col = center_col - len(word) // 2
-                    if self.can_place_word(word, center_row, start_col, 'horizontal'):
-                        self.place_word(word, center_row, start_col, 'horizontal')
-                        self.positions.append({
-                            'word': word,
-                            'row': center_row,
-                            'col': start_col,
-                            'direction': 'horizontal',
-                            'definition': first_word['definition']
-                        })
-                        self.words.append(word)
+            # Most-constrained word first: the word with the fewest valid
+            # placements that still has at least one
+            choice = None
+            bound = score
+            for i, (word_data, word, signature) in enumerate(remaining):
+                # Words sharing no letter with the open cells cannot cross
+                if not layout.can_cross(signature):
+                    continue
+                candidates = [candidate for candidate in layout.get_intersections(word)
+                              if layout.can_place_word(word, *candidate)]
+                if candidates:
+                    bound += 10 + len(word) * letter_value
+                    if choice is None or len(candidates) < len(choice[1]):
+                        choice = (i, candidates)
             
-            # Try to place remaining words
-            for word_data in sorted_words[1:]:
-                word = word_data['word'].upper()
-                if len(word) <= self.max_size:
-                    intersections = self.get_intersections(word)
-                    
-                    # Try each intersection
-                    placed = False
-                    for row, col, direction in intersections:
-                        if self.can_place_word(word, row, col, direction):
-                            self.place_word(word, row, col, direction)
-                            self.positions.append({
-                                'word': word,
-                                'row': row,
-                                'col': col,
-                                'direction': direction,
-                                'definition': word_data['definition']
-                            })
-                            self.words.append(word)
-                            placed = True
-                            break
-                    
-                    # If no intersection found, try random placement
-                    if not placed and len(self.words) < 3:
-                        for _ in range(10):
-                            row = random.randint(0, self.max_size - len(word))
-                            col = random.randint(0, self.max_size - len(word))
-                            direction = random.choice(['horizontal', 'vertical'])
-                            
-                            if self.can_place_word(word, row, col, direction):
-                                self.place_word(word, row, col, direction)
-                                self.positions.append({
-                                    'word': word,
-                                    'row': row,
-                                    'col': col,
-                                    'direction': direction,
-                                    'definition': word_data['definition']
-                                })
-                                self.words.append(word)
-                                break
+            # Prune when placing every word that still fits cannot beat the
+            # best layout found so far
+            if choice is None or bound <= best_key[0]:
+                return True
             
-            # Calculate score for this puzzle
-            score = self.calculate_puzzle_score()
+            i, candidates = choice
+            word_data, word, signature = remaining[i]
+            rest = remaining[:i] + remaining[i + 1:]
+            # Try the placements that keep the layout compact first
+            layout.rng.shuffle(candidates)
+            candidates.sort(key=lambda candidate: layout.bbox_area(layout.bbox_with(len(word), *candidate)))
+            for row, col, direction in candidates[:self.branch_limit]:
+                undo = layout.add_word(word_data, word, row, col, direction)
+                keep_going = yield from search(rest)
+                layout.remove_last_word(undo)
+                if not keep_going:
+                    return False
             
-            if score > best_score:
-                best_score = score
-                # Separate across and down clues
-                across_clues = []
-                down_clues = []
-                for i, pos in enumerate(self.positions):
-                    clue_data = {
-                        'number': i + 1,
-                        'definition': pos['definition']
-                    }
-                    if pos['direction'] == 'horizontal':
-                        across_clues.append(clue_data)
-                    else:
-                        down_clues.append(clue_data)
-                
-                best_puzzle = {
-                    'grid': [row[:] for row in self.grid],
-                    'words': self.words[:],
-                    'positions': self.positions[:],
-                    'score': score,
-                    'across_clues': across_clues,
-                    'down_clues': down_clues
-                }
+            # Finally try leaving this word out
+            return (yield from search(rest))
         
+        yield from search(remaining)
+        metrics.observe('crossword_search_nodes', nodes)
+        metrics.observe('crossword_skipped_words', layout.skipped_words)
+    
+    def generate_crossword_parallel(self, words_with_definitions, time_limit=60, max_attempts=100, target_score=None,
+                                    seed=None):
+        """Spread the attempt budget over the process pool and keep the best puzzle"""
+        best_puzzle = None
+        for best_puzzle in self.iter_crossword_parallel(words_with_definitions, time_limit,
+                                                        max_attempts, target_score, seed):
+            pass
         return best_puzzle
     
-    def calculate_puzzle_score(self):
-        """Calculate a score for the puzzle quality"""
-        if not self.words:
-            return 0
+    def iter_crossword_parallel(self, words_with_definitions, time_limit=60, max_attempts=100, target_score=None,
+                                seed=None):
+        """Yield each improved puzzle as the process pool finishes its tasks"""
+        deadline = time.time() + time_limit
+        executor = self.get_executor()
+        options = self.worker_options()
         
-        # Count filled cells
-        filled_cells = sum(1 for row in self.grid for cell in row if cell != ' ')
-        total_cells = len(self.grid) * len(self.grid[0])
-        density = filled_cells / total_cells
+        # Small tasks let the pool stop early once the target score is reached.
+        # A backtracking search is not split up: each worker runs one with its
+        # own seed.
+        if self.engine == 'backtrack':
+            task_attempts = [1] * self.workers
+        else:
+            task_attempts = [min(self.attempts_per_task, max_attempts - start)
+                             for start in range(0, max_attempts, self.attempts_per_task)]
+        base_seed = seed if seed is not None else random.randrange(2 ** 32)
+        futures = [executor.submit(_generate_attempts, words_with_definitions, deadline,
+                                   attempts, target_score, base_seed + i, options)
+                   for i, attempts in enumerate(task_attempts)]
         
-        # Bonus for more words
-        word_bonus = len(self.words) * 10
-        
-        # Bonus for longer words
-        length_bonus = sum(len(word) for word in self.words)
-        
-        # Penalty for empty space
-        empty_penalty = (1 - density) * 100
+        best_score = None
+        try:
+            for future in as_completed(futures, timeout=max(0, deadline - time.time()) + 5):
+                puzzle = future.result()
+                if puzzle and (best_score is None or puzzle['score'] > best_score):
+                    best_score = puzzle['score']
+                    yield puzzle
+                if target_score is not None and best_score is not None and best_score >= target_score:
+                    break
+        except FuturesTimeout:
+            pass
+        finally:
+            # Also runs when the caller closes the iterator early
+            for future in futures:
+                future.cancel()
+
+class DefinitionCache:
+    """Word -> definition cache: an in-process LRU in front of a SQLite file
+
+    The SQLite file is shared by every worker process on the host. A NULL
+    definition records that WordNet has no entry for the word, so misses
+    are not looked up again either.
+    """
+    
+    def __init__(self, path=None, max_entries=10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+    
+    def _connect(self):
+        """Return this thread's connection to the on-disk store"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS definitions (word TEXT PRIMARY KEY, definition TEXT)')
+            self._local.conn = conn
+        return conn
+    
+    def _remember(self, word, definition):
+        with self._lock:
+            self._entries[word] = definition
+            self._entries.move_to_end(word)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def get(self, word):
+        """Return (found, definition) for a word"""
+        with self._lock:
+            if word in self._entries:
+                self._entries.move_to_end(word)
+                return True, self._entries[word]
+        if not self.path:
+            return False, None
+        try:
+            row = self._connect().execute(
+                'SELECT definition FROM definitions WHERE word = ?', (word,)).fetchone()
+        except sqlite3.Error:
+            # The disk store is only an optimisation
+            return False, None
+        if row is None:
+            return False, None
+        self._remember(word, row[0])
+        return True, row[0]
+    
+    def put_many(self, items):
+        """Store (word, definition) pairs in memory and on disk"""
+        items = list(items)
+        for word, definition in items:
+            self._remember(word, definition)
+        if not self.path:
+            return
+        try:
+            conn = self._connect()
+            with conn:
+                conn.executemany('INSERT OR REPLACE INTO definitions VALUES (?, ?)', items)
+        except sqlite3.Error:
+            pass
+    
+    def put(self, word, definition):
+        self.put_many([(word, definition)])
+
+class DictionaryIndex:
+    """Read-only word -> (frequency rank, definition) table in a memory-mapped file
+
+    The file is built once with build() and shared by every worker through
+    the page cache. It holds a header, the sorted words with their offsets,
+    one (rank, definition offset, definition length) record per word and
+    the definitions themselves. Rank 0 means the word is not in the
+    frequency list and a zero length that WordNet has no definition for it.
+    """
+    
+    MAGIC = b'XWIDX1\0\0'
+    HEADER = struct.Struct('<8sIII')
+    UNRANKED = 2 ** 32
+    
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, keys_size, defs_size = self.HEADER.unpack_from(self._map)
+        if magic != self.MAGIC:
+            raise ValueError(f"{path} is not a dictionary index")
+        view = memoryview(self._map)
+        start = self.HEADER.size
+        self._offsets = view[start:start + 4 * (self.count + 1)].cast('I')
+        start += 4 * (self.count + 1)
+        self._records = view[start:start + 12 * self.count].cast('I')
+        start += 12 * self.count
+        self._keys = start
+        self._defs = start + keys_size
+    
+    @classmethod
+    def build(cls, path, entries):
+        """Write an index from (word, rank, definition) entries"""
+        entries = sorted({word.encode('utf-8'): (rank, definition)
+                          for word, rank, definition in entries}.items())
+        offsets = [0]
+        records = []
+        keys = bytearray()
+        defs = bytearray()
+        for key, (rank, definition) in entries:
+            keys += key
+            offsets.append(len(keys))
+            encoded = (definition or '').encode('utf-8')
+            records.extend((rank, len(defs), len(encoded)))
+            defs += encoded
         
-        return word_bonus + length_bonus - empty_penalty
+        # Replace the file in one step so mapped readers keep the old copy
+        tmp = f"{path}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, len(entries), len(keys), len(defs)))
+            f.write(struct.pack(f'{len(offsets)}I', *offsets))
+            f.write(struct.pack(f'{len(records)}I', *records))
+            f.write(keys)
+            f.write(defs)
+        os.replace(tmp, path)
+    
+    def _find(self, word):
+        """Position of a word in the sorted keys, or -1"""
+        key = word.encode('utf-8')
+        offsets, base = self._offsets, self._keys
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            probe = self._map[base + offsets[middle]:base + offsets[middle + 1]]
+            if probe < key:
+                low = middle + 1
+            elif probe > key:
+                high = middle
+            else:
+                return middle
+        return -1
+    
+    def get(self, word):
+        """Return (found, definition) for a word, like DefinitionCache.get"""
+        position = self._find(word)
+        if position < 0:
+            return False, None
+        offset, length = self._records[3 * position + 1], self._records[3 * position + 2]
+        if not length:
+            return True, None
+        start = self._defs + offset
+        return True, self._map[start:start + length].decode('utf-8')
+    
+    def rank_words(self, words):
+        """Order words for selection without looking any definition up
 
-class WebScraper:
+        Words with a definition come first, most frequent first, then words
+        the index does not know, then words known to have no definition.
+        Ties keep their original order.
+        """
+        ranked = []
+        for position, word in enumerate(words):
+            found = self._find(word)
+            if found < 0:
+                ranked.append((1, 0, position, word))
+            else:
+                rank, length = self._records[3 * found], self._records[3 * found + 2]
+                ranked.append((0 if length else 2, rank or self.UNRANKED, position, word))
+        ranked.sort()
+        return [word for _, _, _, word in ranked]
+    
+    def close(self):
+        self._offsets.release()
+        self._records.release()
+        self._map.close()
+
+def load_dictionary_index(path):
+    """Map the index at path, or return None when there is none"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return DictionaryIndex(path)
+    except (OSError, ValueError, struct.error) as e:
+        app.logger.warning("Ignoring dictionary index %s: %s", path, e)
+        return None
+
+class PageCache:
+    """Words and links extracted from pages, keyed by normalized URL
+
+    Entries keep the ETag / Last-Modified validators of the page so it can
+    be revalidated with a conditional GET, and the least recently used
+    entries are evicted once the cache holds more than max_bytes.
+    """
+    
+    DEFAULT_PORTS = {'http': 80, 'https': 443}
+    
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def normalize_url(cls, url):
+        """Lower-case scheme and host, drop default ports and fragments"""
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+        netloc = (parts.hostname or '').lower()
+        if parts.port and parts.port != cls.DEFAULT_PORTS.get(scheme):
+            netloc = f"{netloc}:{parts.port}"
+        return urlunsplit((scheme, netloc, parts.path or '/', parts.query, ''))
+    
+    def get(self, url):
+        """Return the cached entry for a URL, or None"""
+        key = self.normalize_url(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+    
+    def put(self, url, words, etag=None, last_modified=None, links=()):
+        """Cache the words and links extracted from a page"""
+        key = self.normalize_url(url)
+        entry = {
+            'words': words,
+            'links': list(links),
+            'etag': etag,
+            'last_modified': last_modified,
+        }
+        entry['size'] = len(key) + len(json.dumps(words)) + len(json.dumps(entry['links']))
+        if entry['size'] > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old['size']
+            self._entries[key] = entry
+            self.size += entry['size']
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted['size']
+
+class PuzzleCache:
+    """Finished puzzles keyed by what generated them
+
+    An in-process LRU of up to max_entries puzzles, optionally in front of
+    a SQLite file shared by every worker. Puzzles older than ttl seconds
+    are treated as missing in both.
+    """
+    
+    def __init__(self, path=None, max_entries=256, ttl=7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+    
+    @staticmethod
+    def normalize_words(words_with_definitions):
+        """Word list in a canonical order, one entry per word"""
+        words = {}
+        for word_data in words_with_definitions:
+            words.setdefault(word_data['word'].lower(), word_data['definition'])
+        return [{'word': word, 'definition': definition} for word, definition in sorted(words.items())]
+    
+    @staticmethod
+    def make_key(words_with_definitions, options, seed=None):
+        """Hex digest of a normalized word list, generator options and seed"""
+        data = json.dumps([[[word_data['word'], word_data['definition']] for word_data in words_with_definitions],
+                           options, seed], sort_keys=True)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()[:32]
+    
+    def _connect(self):
+        """Return this thread's connection to the on-disk store"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS puzzles (key TEXT PRIMARY KEY, created REAL, puzzle TEXT)')
+            self._local.conn = conn
+        return conn
+    
+    def _remember(self, key, created, puzzle):
+        with self._lock:
+            self._entries[key] = (created, puzzle)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def get(self, key):
+        """Return the cached puzzle for a key, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[0] < self.ttl:
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                del self._entries[key]
+        if not self.path:
+            return None
+        try:
+            row = self._connect().execute(
+                'SELECT created, puzzle FROM puzzles WHERE key = ? AND created > ?',
+                (key, now - self.ttl)).fetchone()
+        except sqlite3.Error:
+            # The disk store is only an optimisation
+            return None
+        if row is None:
+            return None
+        puzzle = json.loads(row[1])
+        self._remember(key, row[0], puzzle)
+        return puzzle
+    
+    def put(self, key, puzzle):
+        """Store a puzzle in memory and on disk"""
+        created = time.time()
+        self._remember(key, created, puzzle)
+        if not self.path:
+            return
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute('INSERT OR REPLACE INTO puzzles VALUES (?, ?, ?)',
+                             (key, created, json.dumps(puzzle)))
+                conn.execute('DELETE FROM puzzles WHERE created <= ?', (created - self.ttl,))
+        except sqlite3.Error:
+            pass
+
+# Common words that make poor crossword entries
+STOP_WORDS = frozenset([
+    'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had', 'her', 'was',
+    'one', 'our', 'out', 'day', 'get', 'has', 'him', 'his', 'how', 'man', 'new', 'now',
+    'old', 'see', 'two', 'way', 'who', 'boy', 'did', 'its', 'let', 'put', 'say', 'she',
+    'too', 'use',
+])
+
+_WORD_RE = re.compile(r'\w+')
+
+# The (possibly cut-off) word at the end of a chunk of text
+_PARTIAL_WORD_RE = re.compile(r'\w*\Z')
+
+# NLTK's word_tokenize used to split these words in two; the halves are kept
+# so extraction returns the same words as before
+_SPLIT_WORDS = {
+    'cannot': ('can', 'not'),
+    'gimme': ('gim', 'me'),
+    'gonna': ('gon', 'na'),
+    'gotta': ('got', 'ta'),
+    'lemme': ('lem', 'me'),
+    'wanna': ('wan', 'na'),
+}
+
+# Elements whose text is used for words, and elements whose content is skipped
+CONTENT_TAGS = frozenset(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li', 'div'])
+SKIPPED_TAGS = frozenset(['script', 'style'])
+
+class TextExtractor(HTMLParser):
+    """Incremental HTML parser that collects the text of content elements
+
+    Markup is fed in chunks and take_text() returns the text collected
+    since the last call. Each piece of text is collected once, however
+    deeply the content elements around it are nested.
+    """
+    
     def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._content_depth = 0
+        self._skip_depth = 0
+        self._parts = []
+        self._links = []
+    
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            href = dict(attrs).get('href')
+            if href:
+                self._links.append(href)
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in CONTENT_TAGS:
+            self._content_depth += 1
+            self._parts.append(' ')
+    
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in CONTENT_TAGS and self._content_depth:
+            self._content_depth -= 1
+            self._parts.append(' ')
+    
+    def handle_data(self, data):
+        if self._content_depth and not self._skip_depth:
+            self._parts.append(data)
+    
+    def take_text(self):
+        text = ''.join(self._parts)
+        self._parts = []
+        return text
+    
+    def take_links(self):
+        links = self._links
+        self._links = []
+        return links
+
+class WebScraper:
+    def __init__(self, definitions=None, min_word_length=3, alphabet=None,
+                 word_budget=500, max_bytes=2 * 1024 * 1024, chunk_size=16 * 1024,
+                 pages=None, pool_size=10, host_limit=4, robots_ttl=3600, index=None):
+        # Words shorter than min_word_length, or with letters outside
+        # alphabet (any letter when None), are not extracted
+        self.min_word_length = min_word_length
+        self.alphabet = frozenset(alphabet) if alphabet is not None else None
+        # Pages are read in chunks of chunk_size bytes until word_budget
+        # distinct words were found or max_bytes were read
+        self.word_budget = word_budget
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        if definitions is None:
+            definitions = DefinitionCache(os.environ.get(
+                'DEFINITION_CACHE_PATH',
+                os.path.join(tempfile.gettempdir(), 'crossword-definitions.sqlite3')))
+        self.definitions = definitions
+        # A prebuilt DictionaryIndex answers definitions and ranks candidate
+        # words before anything is looked up
+        if index is None:
+            index = load_dictionary_index(os.environ.get('DICTIONARY_INDEX_PATH'))
+        self.index = index
+        self.pages = pages if pages is not None else PageCache()
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+        # Keep a connection per concurrent fetch instead of discarding them,
+        # and never open more than host_limit at once to the same host
+        self.pool_size = pool_size
+        self.host_limit = host_limit
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._host_slots = {}
+        self._hosts_lock = threading.Lock()
+        # robots.txt rules per site, refreshed after robots_ttl seconds
+        self.robots_ttl = robots_ttl
+        self._robots = {}
+    
+    def host_slot(self, url):
+        """Semaphore bounding concurrent fetches from the URL's host"""
+        host = urlsplit(url).netloc.lower()
+        with self._hosts_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.host_limit)
+        return slot
     
     def is_valid_url(self, url):
         """Check if URL is valid"""
@@ -230,34 +1664,150 @@ class WebScraper:
         except:
             return False
     
+    def lookup_definition(self, word):
+        """Look a word up in WordNet, returning None if it has no entry"""
+        synsets = get_wordnet().synsets(word)
+        if synsets:
+            return synsets[0].definition()
+        return None
+    
+    def find_definition(self, word):
+        """Cached WordNet definition of a lower-case word, or None"""
+        if self.index is not None:
+            found, definition = self.index.get(word)
+            if found:
+                return definition
+        found, definition = self.definitions.get(word)
+        if not found:
+            try:
+                with metrics.stage('wordnet'):
+                    definition = self.lookup_definition(word)
+            except:
+                # WordNet itself failed, so there is nothing worth caching
+                return None
+            self.definitions.put(word, definition)
+        return definition
+    
     def get_word_definition(self, word):
         """Get definition for a word using WordNet"""
-        try:
-            synsets = wordnet.synsets(word.lower())
-            if synsets:
-                return synsets[0].definition()
-            return f"A {word.lower()}"
-        except:
-            return f"A {word.lower()}"
+        word = word.lower()
+        definition = self.find_definition(word)
+        if definition is None:
+            return f"A {word}"
+        return definition
+    
+    def iter_words(self, text):
+        """Yield candidate words from text in a single pass"""
+        min_length = self.min_word_length
+        alphabet = self.alphabet
+        for match in _WORD_RE.finditer(text):
+            token = match.group().lower()
+            for word in _SPLIT_WORDS.get(token, (token,)):
+                if (len(word) >= min_length and
+                    word.isalpha() and
+                    word not in STOP_WORDS and
+                    (alphabet is None or alphabet.issuperset(word))):
+                    yield word
+    
+    def rank_words(self, words):
+        """Most promising words first, or page order without an index"""
+        if self.index is None:
+            return list(words)
+        return self.index.rank_words(words)
     
     def extract_words_from_text(self, text):
         """Extract meaningful words from text"""
-        # Clean text
-        text = re.sub(r'[^\w\s]', ' ', text)
-        text = re.sub(r'\s+', ' ', text)
+        return list(set(self.iter_words(text)))  # Remove duplicates
+    
+    def response_encoding(self, response):
+        """Encoding declared by the server, falling back to UTF-8"""
+        if 'charset' in response.headers.get('content-type', '').lower():
+            return response.encoding
+        return 'utf-8'
+    
+    def extract_words_from_html(self, chunks, encoding='utf-8', links=None):
+        """Extract words, in page order, from HTML arriving as byte chunks
+
+        Reading stops once word_budget distinct words were found or max_bytes
+        were read, so memory and CPU stay flat on huge pages. The href of
+        every link read is appended to links when it is given.
+        """
+        try:
+            decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        except LookupError:
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        parser = TextExtractor()
+        words = {}
+        pending = ''
+        received = 0
+        # Time left over once parsing and tokenizing are taken out was spent
+        # waiting for the chunks
+        started = time.perf_counter()
+        parse_seconds = tokenize_seconds = 0.0
+        
+        for chunk in chunks:
+            chunk = chunk[:self.max_bytes - received]
+            received += len(chunk)
+            parse_started = time.perf_counter()
+            parser.feed(decoder.decode(chunk))
+            
+            # Hold back a word that may continue in the next chunk
+            text = pending + parser.take_text()
+            cut = _PARTIAL_WORD_RE.search(text).start()
+            pending = text[cut:]
+            tokenize_started = time.perf_counter()
+            for word in self.iter_words(text[:cut]):
+                words[word] = None
+            parse_seconds += tokenize_started - parse_started
+            tokenize_seconds += time.perf_counter() - tokenize_started
+            if links is not None:
+                links.extend(parser.take_links())
+            if len(words) >= self.word_budget or received >= self.max_bytes:
+                break
+        else:
+            # The whole document was read, so the held-back word is complete
+            parser.feed(decoder.decode(b'', final=True))
+            parser.close()
+            for word in self.iter_words(pending + parser.take_text()):
+                words[word] = None
+            if links is not None:
+                links.extend(parser.take_links())
         
-        # Tokenize
-        tokens = word_tokenize(text.lower())
+        metrics.observe_stage('parse', parse_seconds)
+        metrics.observe_stage('tokenize', tokenize_seconds)
+        metrics.observe_stage('read', time.perf_counter() - started - parse_seconds - tokenize_seconds)
+        return list(words)[:self.word_budget]
+    
+    def fetch_page(self, url):
+        """Fetch a page, returning (words, links) with links made absolute"""
+        # Revalidate a cached page instead of fetching and parsing it again
+        cached = self.pages.get(url)
+        headers = {}
+        if cached:
+            if cached['etag']:
+                headers['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                headers['If-Modified-Since'] = cached['last_modified']
         
-        # Filter words
-        words = []
-        for token in tokens:
-            if (len(token) >= 3 and 
-                token.isalpha() and 
-                token not in ['the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had', 'her', 'was', 'one', 'our', 'out', 'day', 'get', 'has', 'him', 'his', 'how', 'man', 'new', 'now', 'old', 'see', 'two', 'way', 'who', 'boy', 'did', 'its', 'let', 'put', 'say', 'she', 'too', 'use']):
-                words.append(token)
+        links = []
+        with self.host_slot(url):
+            with metrics.stage('fetch'):
+                response = self.session.get(url, timeout=10, stream=True, headers=headers)
+            with response:
+                if cached and response.status_code == 304:
+                    return list(cached['words']), list(cached['links'])
+                response.raise_for_status()
+                words = self.extract_words_from_html(
+                    response.iter_content(chunk_size=self.chunk_size),
+                    self.response_encoding(response), links)
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
         
-        return list(set(words))  # Remove duplicates
+        links = [urljoin(url, link) for link in dict.fromkeys(links)]
+        # Only pages that can be revalidated are worth caching
+        if etag or last_modified:
+            self.pages.put(url, words, etag, last_modified, links)
+        return words, links
     
     def scrape_website(self, url):
         """Scrape website and extract words with definitions"""
@@ -265,48 +1815,17 @@ class WebScraper:
             raise ValueError("Invalid URL provided")
         
         try:
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            # Extract text from various elements
-            text_elements = []
-            
-            # Get text from paragraphs
-            for p in soup.find_all('p'):
-                text_elements.append(p.get_text())
-            
-            # Get text from headings
-            for h in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
-                text_elements.append(h.get_text())
-            
-            # Get text from list items
-            for li in soup.find_all('li'):
-                text_elements.append(li.get_text())
-            
-            # Get text from divs (limited to avoid too much content)
-            for div in soup.find_all('div')[:10]:
-                text_elements.append(div.get_text())
-            
-            # Combine all text
-            full_text = ' '.join(text_elements)
-            
-            # Extract words
-            words = self.extract_words_from_text(full_text)
+            words, _ = self.fetch_page(url)
             
             # Get definitions and create word list
             words_with_definitions = []
-            for word in words[:50]:  # Limit to 50 words
-                definition = self.get_word_definition(word)
-                words_with_definitions.append({
-                    'word': word,
-                    'definition': definition
-                })
+            with metrics.stage('define'):
+                for word in self.rank_words(words)[:50]:  # Limit to 50 words
+                    definition = self.get_word_definition(word)
+                    words_with_definitions.append({
+                        'word': word,
+                        'definition': definition
+                    })
             
             return words_with_definitions
             
@@ -314,10 +1833,588 @@ class WebScraper:
             raise ValueError(f"Failed to fetch website: {str(e)}")
         except Exception as e:
             raise ValueError(f"Error processing website: {str(e)}")
+    
+    def robots(self, url):
+        """Cached robots.txt rules for the URL's site"""
+        parts = urlsplit(url)
+        site = f"{parts.scheme}://{parts.netloc.lower()}"
+        now = time.time()
+        with self._hosts_lock:
+            entry = self._robots.get(site)
+        if entry is not None and now - entry[0] < self.robots_ttl:
+            return entry[1]
+        
+        rules = RobotFileParser()
+        try:
+            with self.host_slot(url), self.session.get(site + '/robots.txt', timeout=5) as response:
+                if response.status_code in (401, 403):
+                    rules.disallow_all = True
+                elif response.status_code < 400:
+                    rules.parse(response.text.splitlines())
+                else:
+                    rules.allow_all = True
+        except requests.RequestException:
+            # An unreachable robots.txt does not forbid anything
+            rules.allow_all = True
+        with self._hosts_lock:
+            self._robots[site] = (now, rules)
+        return rules
+    
+    def can_crawl(self, url):
+        """Check robots.txt before following a link"""
+        return self.robots(url).can_fetch(self.session.headers['User-Agent'], url)
+    
+    def crawl_website(self, url, max_depth=1, max_pages=8, target_words=50):
+        """Scrape a page and the same-site pages it links to
+
+        Pages are read breadth first, each level fetched concurrently, up to
+        max_depth links away from url and max_pages pages in all. Links
+        are followed only where robots.txt allows it. The crawl stops as
+        soon as target_words distinct words with a WordNet definition were
+        found; words without one only fill up the list when it falls short.
+        """
+        if not self.is_valid_url(url):
+            raise ValueError("Invalid URL provided")
+        
+        site = urlsplit(url).netloc.lower()
+        visited = {PageCache.normalize_url(url)}
+        level = [url]
+        defined = {}
+        undefined = {}
+        
+        for depth in range(max_depth + 1):
+            next_level = []
+            for page_url, page, error in self.iter_scrape(level, scrape=self.fetch_page):
+                if error is not None:
+                    if page_url == url:
+                        # The page asked for must be readable, linked ones may fail
+                        if isinstance(error, requests.RequestException):
+                            raise ValueError(f"Failed to fetch website: {str(error)}")
+                        raise ValueError(f"Error processing website: {str(error)}")
+                    continue
+                words, links = page
+                for word in self.rank_words(words):
+                    if word in defined or word in undefined:
+                        continue
+                    definition = self.find_definition(word)
+                    if definition is None:
+                        undefined[word] = f"A {word}"
+                    else:
+                        defined[word] = definition
+                        if len(defined) >= target_words:
+                            break
+                if len(defined) >= target_words:
+                    break
+                
+                if depth < max_depth:
+                    for link in links:
+                        parts = urlsplit(link)
+                        key = PageCache.normalize_url(link)
+                        if (parts.scheme in ('http', 'https') and parts.netloc.lower() == site and
+                                key not in visited and len(visited) < max_pages):
+                            visited.add(key)
+                            next_level.append(key)
+            
+            if len(defined) >= target_words:
+                break
+            level = [link for link in next_level if self.can_crawl(link)]
+            if not level:
+                break
+        
+        words = list(defined.items()) + list(undefined.items())
+        return [{'word': word, 'definition': definition}
+                for word, definition in words[:target_words]]
+    
+    def iter_scrape(self, urls, concurrency=None, scrape=None):
+        """Scrape several URLs at once, yielding (url, result, error) as each finishes
+
+        Fetches share the session's connection pool and per-host limits, so
+        network waits overlap without hammering a single site. Each URL is
+        passed to scrape, scrape_website by default. URLs not yet started
+        are cancelled when the caller stops reading.
+        """
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return
+        scrape = scrape or self.scrape_website
+        workers = min(concurrency or self.pool_size, len(urls))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='crossword-fetch') as executor:
+            futures = {executor.submit(scrape, url): url for url in urls}
+            try:
+                for future in as_completed(futures):
+                    try:
+                        yield futures[future], future.result(), None
+                    except Exception as e:
+                        yield futures[future], None, e
+            finally:
+                for future in futures:
+                    future.cancel()
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are already waiting"""
+
+class JobQueue:
+    """Runs crossword jobs on a bounded pool of background threads
+
+    Job records live in a SQLite file shared by every worker process, so a
+    job can be polled from any of them; it runs in the process that queued
+    it. A job for a URL that is already queued or running is shared rather
+    than started twice, new jobs are refused once max_pending jobs are
+    waiting, and finished jobs are forgotten after ttl seconds. Jobs still
+    unfinished after ttl seconds are taken to have died with their process.
+    """
+    
+    IN_FLIGHT = ('queued', 'running')
+    
+    def __init__(self, run, path, max_workers=2, max_pending=20, ttl=600, poll_interval=0.5):
+        self.run = run
+        self.path = path
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='crossword-job')
+        self._local = threading.local()
+        # Wakes wait() as soon as a job of this process finishes
+        self._finished = threading.Condition()
+    
+    def _connect(self):
+        """Return this thread's connection to the job store"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, key TEXT, url TEXT, '
+                         'status TEXT, created REAL, finished REAL, result TEXT, error TEXT)')
+            conn.execute('CREATE INDEX IF NOT EXISTS jobs_key ON jobs (key, status)')
+            self._local.conn = conn
+        return conn
+    
+    @staticmethod
+    def _job(row):
+        job = dict(row)
+        del job['key']
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        return job
+    
+    def submit(self, url):
+        """Queue a job for a URL, returning (job, created)"""
+        key = PageCache.normalize_url(url)
+        now = time.time()
+        conn = self._connect()
+        # BEGIN IMMEDIATE takes the write lock, so checking for a running
+        # job and adding a new one is atomic across processes
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._expire(conn, now)
+            row = conn.execute('SELECT * FROM jobs WHERE key = ? AND status IN (?, ?)',
+                               (key,) + self.IN_FLIGHT).fetchone()
+            if row is not None:
+                conn.execute('COMMIT')
+                return self._job(row), False
+            if self._pending(conn) >= self.max_pending:
+                raise JobQueueFull("Too many crossword jobs are waiting, please try again later")
+            job = {
+                'id': uuid.uuid4().hex,
+                'url': url,
+                'status': 'queued',
+                'created': now,
+                'finished': None,
+                'result': None,
+                'error': None,
+            }
+            conn.execute('INSERT INTO jobs VALUES (?, ?, ?, ?, ?, NULL, NULL, NULL)',
+                         (job['id'], key, url, job['status'], now))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        self._executor.submit(self._run_job, job['id'], url)
+        return job, True
+    
+    def get(self, job_id):
+        row = self._connect().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._job(row) if row is not None else None
+    
+    def wait(self, job_id, timeout):
+        """Return a job once it has finished, or as it is after timeout seconds"""
+        deadline = time.time() + timeout
+        while True:
+            job = self.get(job_id)
+            remaining = deadline - time.time()
+            if job is None or job['status'] not in self.IN_FLIGHT or remaining <= 0:
+                return job
+            with self._finished:
+                self._finished.wait(min(self.poll_interval, remaining))
+    
+    def pending(self):
+        """Number of jobs queued or running"""
+        return self._pending(self._connect())
+    
+    def _pending(self, conn):
+        return conn.execute('SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)', self.IN_FLIGHT).fetchone()[0]
+    
+    def _update(self, job_id, **fields):
+        columns = ', '.join(f"{name} = ?" for name in fields)
+        self._connect().execute(f"UPDATE jobs SET {columns} WHERE id = ?", tuple(fields.values()) + (job_id,))
+    
+    def _run_job(self, job_id, url):
+        self._update(job_id, status='running')
+        try:
+            result = self.run(url)
+            self._update(job_id, status='done', result=json.dumps(result), finished=time.time())
+        except ValueError as e:
+            self._update(job_id, status='failed', error=str(e), finished=time.time())
+        except Exception as e:
+            self._update(job_id, status='failed', error=f"An unexpected error occurred: {str(e)}",
+                         finished=time.time())
+        finally:
+            with self._finished:
+                self._finished.notify_all()
+    
+    def _expire(self, conn, now):
+        cutoff = now - self.ttl
+        conn.execute('DELETE FROM jobs WHERE finished IS NOT NULL AND finished < ?', (cutoff,))
+        conn.execute('UPDATE jobs SET status = ?, error = ?, finished = ? WHERE status IN (?, ?) AND created < ?',
+                     ('failed', "The job was lost, please try again", now) + self.IN_FLIGHT + (cutoff,))
+    
+    @staticmethod
+    def describe(job):
+        """JSON-friendly view of a job"""
+        view = {'job_id': job['id'], 'status': job['status'], 'url': job['url']}
+        if job['status'] == 'done':
+            view.update(job['result'])
+        elif job['status'] == 'failed':
+            view['error'] = job['error']
+        return view
 
 # Global instances
 scraper = WebScraper()
-crossword_gen = CrosswordGenerator()
+crossword_gen = CrosswordGenerator(workers=int(os.environ.get('CROSSWORD_WORKERS', '1')))
+
+puzzle_cache = PuzzleCache(os.environ.get('PUZZLE_CACHE_PATH',
+                                          os.path.join(tempfile.gettempdir(), 'crossword-puzzles.sqlite3')),
+                           ttl=int(os.environ.get('PUZZLE_CACHE_TTL', str(7 * 24 * 3600))))
+
+def puzzle_request(words_with_definitions, seed=None, generator=None, time_limit=60, max_attempts=100):
+    """Normalize a word list and pick its seed and cache key
+
+    Without a seed one is derived from the word list, so a repeated request
+    gets the same puzzle back from the cache. The key also covers the
+    search budget, so a quick run is never served for a longer one.
+    """
+    generator = generator or crossword_gen
+    words_with_definitions = PuzzleCache.normalize_words(words_with_definitions)
+    if seed is None:
+        seed = int(PuzzleCache.make_key(words_with_definitions, None)[:8], 16)
+    options = dict(generator.worker_options(), time_limit=time_limit, max_attempts=max_attempts)
+    key = PuzzleCache.make_key(words_with_definitions, options, seed)
+    return words_with_definitions, seed, key
+
+def remember_puzzle(puzzle, seed, key):
+    """Tag a new puzzle with its seed and share id, and cache it"""
+    puzzle = dict(puzzle, seed=seed, puzzle_id=key)
+    puzzle_cache.put(key, puzzle)
+    return puzzle
+
+def generate_puzzle(words_with_definitions, time_limit=60, seed=None):
+    """Run the shared generator, or reuse the puzzle it made for the same input"""
+    words_with_definitions, seed, key = puzzle_request(words_with_definitions, seed, time_limit=time_limit)
+    puzzle = puzzle_cache.get(key)
+    if puzzle is None:
+        puzzle = crossword_gen.generate_crossword(words_with_definitions, time_limit=time_limit, seed=seed)
+        if puzzle:
+            puzzle = remember_puzzle(puzzle, seed, key)
+    return puzzle
+
+def iter_puzzles(words_with_definitions, time_limit=60, seed=None):
+    """Run the shared generator, yielding each improved puzzle
+
+    Returns the cached puzzle, which carries the share id, once the run
+    has finished (None when no puzzle was found). The puzzles yielded
+    before then have no puzzle_id, since their share link would not work
+    yet.
+    """
+    words_with_definitions, seed, key = puzzle_request(words_with_definitions, seed, time_limit=time_limit)
+    puzzle = puzzle_cache.get(key)
+    if puzzle is not None:
+        yield puzzle
+        return puzzle
+    
+    best = None
+    for best in crossword_gen.iter_crossword(words_with_definitions, time_limit=time_limit, seed=seed):
+        yield dict(best, seed=seed)
+    # Only a run that finished has the puzzle generate_puzzle would return
+    if best is not None:
+        return remember_puzzle(best, seed, key)
+    return None
+
+def generate_from_url(url):
+    """Scrape a URL and build its crossword, raising ValueError on failure"""
+    words_with_definitions = scraper.scrape_website(url)
+    if not words_with_definitions:
+        raise ValueError("No suitable words found on the website")
+    puzzle = generate_puzzle(words_with_definitions, time_limit=60)
+    if not puzzle:
+        raise ValueError("Could not generate a crossword puzzle")
+    return {'success': True, 'puzzle': puzzle, 'source_url': url}
+
+def parse_batch_item(item):
+    """Turn a batch input into (source, url, crawl, words_with_definitions)
+
+    An item is a URL string, {"url": ..., "crawl": false}, or {"words": [...]}
+    where each word is a {"word", "definition"} object or a [word, definition]
+    pair. An exception, such as a line that could not be decoded, is raised
+    so that it is reported as the item's error.
+    """
+    if isinstance(item, Exception):
+        raise item
+    if isinstance(item, str):
+        item = {'url': item}
+    if not isinstance(item, dict):
+        raise ValueError("Batch items must be a URL or an object")
+    if item.get('words') is not None:
+        words_with_definitions = []
+        for entry in item['words']:
+            if isinstance(entry, dict):
+                word, definition = entry.get('word'), entry.get('definition')
+            else:
+                word, definition = entry
+            if not isinstance(word, str) or not word.isalpha():
+                raise ValueError(f"Invalid word in batch item: {word!r}")
+            words_with_definitions.append({'word': word.lower(), 'definition': definition or f"A {word.lower()}"})
+        return item.get('id', 'words'), None, False, words_with_definitions
+    url = item.get('url') or ''
+    if not isinstance(url, str):
+        raise ValueError("The URL must be a string")
+    url = url.strip()
+    if not url:
+        raise ValueError("Please provide a URL or a word list")
+    return item.get('id', url), url, bool(item.get('crawl')), None
+
+def iter_batch(items, concurrency=8, workers=None, time_limit=10, max_attempts=100):
+    """Generate crosswords for many URLs or word lists
+
+    Pages are fetched concurrently through the shared scraper, and each
+    word list is generated on a process pool as soon as it is ready, unless
+    the puzzle cache already has its puzzle. Yields one result dict per
+    item, in completion order; a failing item is reported with its error
+    and does not stop the batch.
+
+    Without workers, generation runs on the shared generator's pool
+    (CROSSWORD_WORKERS processes), so concurrent batches share its bound.
+    """
+    def failure(index, source, error):
+        if isinstance(error, ValueError):
+            message = str(error)
+        else:
+            message = f"An unexpected error occurred: {str(error)}"
+        return {'index': index, 'source': source, 'success': False, 'error': message}
+    
+    options = crossword_gen.worker_options()
+    if workers is None:
+        generate_pool = crossword_gen.get_executor()
+    else:
+        generate_pool = ProcessPoolExecutor(max_workers=workers)
+    generations = {}
+    try:
+        def submit(index, source, words_with_definitions):
+            """Queue generation, or return the result straight away from the cache"""
+            words_with_definitions, seed, key = puzzle_request(words_with_definitions, time_limit=time_limit,
+                                                               max_attempts=max_attempts)
+            puzzle = puzzle_cache.get(key)
+            if puzzle is not None:
+                return {'index': index, 'source': source, 'success': True, 'puzzle': puzzle}
+            generation = generate_pool.submit(_generate_batch_item, words_with_definitions,
+                                              time_limit, max_attempts, options, seed)
+            generations[generation] = (index, source, seed, key)
+            return None
+        
+        # Items sharing a URL share its fetch
+        by_url = defaultdict(list)
+        for index, item in enumerate(items):
+            try:
+                source, url, crawl, words_with_definitions = parse_batch_item(item)
+            except (ValueError, TypeError) as e:
+                yield failure(index, None, ValueError(str(e)))
+                continue
+            if url is None:
+                cached = submit(index, source, words_with_definitions)
+                if cached is not None:
+                    yield cached
+            else:
+                by_url[url, crawl].append((index, source))
+        
+        def scrape(key):
+            url, crawl = key
+            return scraper.crawl_website(url) if crawl else scraper.scrape_website(url)
+        
+        for key, words_with_definitions, error in scraper.iter_scrape(by_url, concurrency, scrape):
+            if error is None and not words_with_definitions:
+                error = ValueError("No suitable words found on the website")
+            for index, source in by_url[key]:
+                if error is not None:
+                    yield failure(index, source, error)
+                    continue
+                cached = submit(index, source, words_with_definitions)
+                if cached is not None:
+                    yield cached
+        
+        for future in as_completed(generations):
+            index, source, seed, key = generations[future]
+            try:
+                puzzle = future.result()
+            except Exception as e:
+                yield failure(index, source, e)
+                continue
+            if not puzzle:
+                yield failure(index, source, ValueError("Could not generate a crossword puzzle"))
+                continue
+            puzzle = remember_puzzle(puzzle, seed, key)
+            yield {'index': index, 'source': source, 'success': True, 'puzzle': puzzle}
+    finally:
+        # Drop queued work of a batch that was abandoned part way
+        for future in generations:
+            future.cancel()
+        if workers is not None:
+            generate_pool.shutdown()
+
+BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', '100'))
+
+jobs = JobQueue(generate_from_url,
+                os.environ.get('JOB_STORE_PATH', os.path.join(tempfile.gettempdir(), 'crossword-jobs.sqlite3')),
+                max_workers=int(os.environ.get('JOB_WORKERS', '2')),
+                max_pending=int(os.environ.get('JOB_MAX_PENDING', '20')))
+
+def read_wordlist(wordlist, limit=None):
+    """Words of a frequency list file, most frequent first
+
+    The file has one word per line; anything after the first whitespace
+    (such as a count) is ignored.
+    """
+    words = []
+    for line in wordlist:
+        fields = line.split()
+        if fields and fields[0].isalpha():
+            words.append(fields[0].lower())
+        if limit is not None and len(words) >= limit:
+            break
+    return words
+
+@app.cli.command('build-definitions')
+@click.argument('wordlist', type=click.File('r', encoding='utf-8'))
+@click.option('--limit', type=int, default=None, help='Only read this many words from the list.')
+def build_definitions(wordlist, limit):
+    """Precompute WordNet definitions for a frequency word list.
+
+    WORDLIST has one word per line, most frequent first; anything after the
+    first whitespace (such as a count) is ignored.
+    """
+    words = read_wordlist(wordlist, limit)
+    
+    batch = []
+    try:
+        for word in words:
+            batch.append((word, scraper.lookup_definition(word)))
+            if len(batch) >= 1000:
+                scraper.definitions.put_many(batch)
+                batch = []
+    except LookupError:
+        raise click.ClickException("WordNet data is not installed; run 'flask warm-up --download' first")
+    scraper.definitions.put_many(batch)
+    
+    click.echo(f"Stored definitions for {len(words)} words in {scraper.definitions.path}")
+
+@app.cli.command('build-index')
+@click.argument('wordlist', type=click.File('r', encoding='utf-8'), required=False)
+@click.option('--output', default=lambda: os.environ.get('DICTIONARY_INDEX_PATH', 'dictionary.idx'),
+              help='Index file to write (default: $DICTIONARY_INDEX_PATH or dictionary.idx).')
+@click.option('--limit', type=int, default=None, help='Only read this many words from the list.')
+def build_index(wordlist, output, limit):
+    """Build the memory-mapped dictionary index from WordNet.
+
+    Every single-word WordNet lemma is stored with its definition. The
+    optional WORDLIST, in the format build-definitions reads, gives the
+    frequency ranks and adds common words WordNet has no entry for.
+    """
+    ranks = {}
+    if wordlist is not None:
+        for word in read_wordlist(wordlist, limit):
+            ranks.setdefault(word, len(ranks) + 1)
+    
+    try:
+        words = set(ranks)
+        words.update(lemma.lower() for lemma in get_wordnet().all_lemma_names() if lemma.isalpha())
+    except LookupError:
+        raise click.ClickException("WordNet data is not installed; run 'flask warm-up --download' first")
+    
+    DictionaryIndex.build(output, ((word, ranks.get(word, 0), scraper.lookup_definition(word))
+                                   for word in words))
+    click.echo(f"Indexed {len(words)} words in {output}")
+
+@app.cli.command('batch')
+@click.argument('input_file', type=click.File('r', encoding='utf-8'))
+@click.argument('output_file', type=click.File('w', encoding='utf-8'))
+@click.option('--concurrency', default=8, show_default=True, help='Pages fetched at the same time.')
+@click.option('--workers', type=int, default=None, help='Generator processes (default: CROSSWORD_WORKERS).')
+@click.option('--time-limit', default=10.0, show_default=True, help='Seconds of generation per puzzle.')
+def batch_command(input_file, output_file, concurrency, workers, time_limit):
+    """Generate puzzles for every line of INPUT_FILE into OUTPUT_FILE.
+
+    Each input line is a URL or a JSON batch item ({"url": ...} or
+    {"words": [...]}). Results are written as JSON Lines as they finish;
+    a line that is not valid JSON is reported as a failed item.
+    """
+    items = []
+    for line in input_file:
+        line = line.strip()
+        if line:
+            try:
+                items.append(json.loads(line) if line[0] in '{["' else line)
+            except ValueError as e:
+                items.append(ValueError(f"Invalid JSON: {e}"))
+    
+    failed = 0
+    for result in iter_batch(items, concurrency=concurrency, workers=workers, time_limit=time_limit):
+        failed += not result['success']
+        output_file.write(json.dumps(result) + '\n')
+        output_file.flush()
+    
+    click.echo(f"Generated {len(items) - failed} of {len(items)} puzzles")
+
+@app.cli.command('warm-up')
+@click.option('--download', is_flag=True, help='Download missing NLTK data first.')
+def warm_up_command(download):
+    """Check the NLTK data and load WordNet, reporting how long it took."""
+    missing = ensure_nltk_data(download=download)
+    if missing:
+        click.echo(f"Missing NLTK data: {', '.join(missing)}")
+    warm_up()
+    click.echo(f"Import: {STARTUP_STATS['import_seconds']:.3f}s, "
+               f"warm-up: {STARTUP_STATS['warm_up_seconds']:.3f}s")
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    if SERVER_TIMING:
+        metrics.start_request()
+
+@app.after_request
+def record_first_request(response):
+    if STARTUP_STATS['first_request_seconds'] is None and 'request_started' in g:
+        STARTUP_STATS['first_request_seconds'] = time.perf_counter() - g.request_started
+        app.logger.info("First request took %.3fs", STARTUP_STATS['first_request_seconds'])
+    return response
+
+@app.after_request
+def add_server_timing(response):
+    if SERVER_TIMING:
+        timings = metrics.finish_request()
+        if 'request_started' in g:
+            timings['total'] = time.perf_counter() - g.request_started
+        response.headers['Server-Timing'] = ', '.join(
+            f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items())
+    return response
 
 @app.route('/')
 def index():
@@ -338,7 +2435,7 @@ def generate_crossword():
             return render_template('index.html', error="No suitable words found on the website")
         
         # Generate crossword
-        puzzle = crossword_gen.generate_crossword(words_with_definitions, time_limit=60)
+        puzzle = generate_puzzle(words_with_definitions, time_limit=60)
         
         if not puzzle:
             return render_template('index.html', error="Could not generate a crossword puzzle")
@@ -354,20 +2451,30 @@ def generate_crossword():
 def api_generate():
     """API endpoint for AJAX requests"""
     data = request.get_json()
-    url = data.get('url', '').strip()
+    url = data.get('url', '')
+    if not isinstance(url, str):
+        return jsonify({'error': 'The URL must be a string'}), 400
+    url = url.strip()
     
     if not url:
         return jsonify({'error': 'Please provide a URL'}), 400
     
+    seed = data.get('seed')
+    if seed is not None and not isinstance(seed, int):
+        return jsonify({'error': 'The seed must be an integer'}), 400
+    
     try:
-        # Scrape website
-        words_with_definitions = scraper.scrape_website(url)
+        # Scrape website, or the site around it when asked to crawl
+        if data.get('crawl'):
+            words_with_definitions = scraper.crawl_website(url)
+        else:
+            words_with_definitions = scraper.scrape_website(url)
         
         if not words_with_definitions:
             return jsonify({'error': 'No suitable words found on the website'}), 400
         
         # Generate crossword
-        puzzle = crossword_gen.generate_crossword(words_with_definitions, time_limit=60)
+        puzzle = generate_puzzle(words_with_definitions, time_limit=60, seed=seed)
         
         if not puzzle:
             return jsonify({'error': 'Could not generate a crossword puzzle'}), 400
@@ -383,6 +2490,166 @@ def api_generate():
     except Exception as e:
         return jsonify({'error': f'An unexpected error occurred: {str(e)}'}), 500
 
+@app.route('/api/generate/stream', methods=['GET', 'POST'])
+def api_generate_stream():
+    """Stream each improved puzzle as a server-sent event
+
+    Takes the URL as a query parameter (for EventSource) or in a JSON body.
+    Generation stops when the client disconnects.
+    """
+    if request.method == 'POST':
+        url = (request.get_json(silent=True) or {}).get('url', '')
+        if not isinstance(url, str):
+            return jsonify({'error': 'The URL must be a string'}), 400
+    else:
+        url = request.args.get('url', '')
+    url = url.strip()
+    
+    if not url:
+        return jsonify({'error': 'Please provide a URL'}), 400
+    
+    def event(name, data):
+        return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+    
+    def puzzle_events(words_with_definitions):
+        """Yield an event per improved puzzle, returning the cached puzzle"""
+        puzzles = iter_puzzles(words_with_definitions, time_limit=60)
+        while True:
+            try:
+                puzzle = next(puzzles)
+            except StopIteration as stop:
+                return stop.value
+            yield event('puzzle', {'puzzle': puzzle, 'source_url': url})
+    
+    def events():
+        try:
+            words_with_definitions = scraper.scrape_website(url)
+            if not words_with_definitions:
+                yield event('error', {'error': 'No suitable words found on the website'})
+                return
+            
+            puzzle = yield from puzzle_events(words_with_definitions)
+            if puzzle is not None:
+                # The share link works from here on
+                yield event('done', {'success': True, 'puzzle_id': puzzle['puzzle_id']})
+            else:
+                yield event('error', {'error': 'Could not generate a crossword puzzle'})
+        except ValueError as e:
+            yield event('error', {'error': str(e)})
+        except Exception as e:
+            yield event('error', {'error': f'An unexpected error occurred: {str(e)}'})
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/puzzle/<puzzle_id>')
+def shared_puzzle(puzzle_id):
+    """Show a previously generated puzzle from its share link"""
+    puzzle = puzzle_cache.get(puzzle_id)
+    if puzzle is None:
+        return render_template('index.html', error="That puzzle has expired, please generate a new one"), 404
+    return render_template('result.html', puzzle=puzzle, source_url=None)
+
+@app.route('/api/puzzles/<puzzle_id>')
+def api_puzzle(puzzle_id):
+    """Return a previously generated puzzle"""
+    puzzle = puzzle_cache.get(puzzle_id)
+    if puzzle is None:
+        return jsonify({'error': 'Puzzle not found or expired'}), 404
+    return jsonify({'success': True, 'puzzle': puzzle})
+
+@app.route('/api/batch', methods=['POST'])
+def api_batch():
+    """Generate many puzzles, streamed back as JSON Lines"""
+    data = request.get_json(silent=True) or {}
+    items = data.get('items')
+    
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'Please provide a list of items'}), 400
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({'error': f'A batch can hold at most {BATCH_MAX_ITEMS} items'}), 400
+    
+    # Checked here, since errors inside the stream arrive after the 200
+    try:
+        time_limit = float(data.get('time_limit', 10))
+    except (TypeError, ValueError):
+        time_limit = None
+    if time_limit is None or not 0 < time_limit < math.inf:
+        return jsonify({'error': 'The time limit must be a positive number of seconds'}), 400
+    time_limit = min(time_limit, 60)
+    
+    def lines():
+        for result in iter_batch(items, time_limit=time_limit):
+            yield json.dumps(result) + '\n'
+    
+    return Response(stream_with_context(lines()), mimetype='application/x-ndjson')
+
+@app.route('/api/jobs', methods=['POST'])
+def api_create_job():
+    """Queue crossword generation and return a job id to poll"""
+    data = request.get_json(silent=True) or {}
+    url = data.get('url', '')
+    if not isinstance(url, str):
+        return jsonify({'error': 'The URL must be a string'}), 400
+    url = url.strip()
+    
+    if not url:
+        return jsonify({'error': 'Please provide a URL'}), 400
+    if not scraper.is_valid_url(url):
+        return jsonify({'error': 'Invalid URL provided'}), 400
+    
+    try:
+        job, created = jobs.submit(url)
+    except JobQueueFull as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '10'
+        return response, 503
+    
+    body = JobQueue.describe(job)
+    body['status_url'] = url_for('api_job_status', job_id=job['id'])
+    body['stream_url'] = url_for('api_job_stream', job_id=job['id'])
+    return jsonify(body), 202 if created else 200
+
+@app.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    """Poll a crossword job"""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(JobQueue.describe(job))
+
+@app.route('/api/jobs/<job_id>/stream')
+def api_job_stream(job_id):
+    """Stream a crossword job's result as server-sent events"""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    
+    def events():
+        current = job
+        while current['status'] in JobQueue.IN_FLIGHT:
+            yield f"event: status\ndata: {json.dumps({'status': current['status']})}\n\n"
+            current = jobs.wait(job_id, timeout=15)
+            if current is None:
+                yield f"event: error\ndata: {json.dumps({'error': 'Unknown job'})}\n\n"
+                return
+        yield f"event: result\ndata: {json.dumps(JobQueue.describe(current))}\n\n"
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/status')
+def api_status():
+    """Report startup costs and job queue depth of this worker"""
+    return jsonify({'startup': STARTUP_STATS, 'pending_jobs': jobs.pending()})
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Stage timings and layout attempt histograms for Prometheus"""
+    if not metrics.enabled:
+        return jsonify({'error': 'Metrics are disabled, set CROSSWORD_METRICS=1'}), 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/test')
 def test_template():
     """Test route to debug template rendering"""
@@ -397,6 +2664,13 @@ def test_template():
 # For Vercel deployment
 app.debug = False
 
+STARTUP_STATS['import_seconds'] = time.perf_counter() - _import_started
+app.logger.info("app.py imported in %.3fs", STARTUP_STATS['import_seconds'])
+
+# With gunicorn --preload this runs once in the master, before forking
+if os.environ.get('CROSSWORD_PRELOAD'):
+    warm_up()
+
 # WSGI application for Vercel
 if __name__ == '__main__':
     app.run(debug=False, host='0.0.0.0', port=5000) 
\ No newline at end of file
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the crossword generator and scraper hot paths
+
+Word lists are synthetic and generated from fixed seeds, and pages come from
+the saved HTML files in bench_fixtures/, so runs are reproducible and never
+touch the network or WordNet. Each benchmark reports calls per second and
+per-call percentiles.
+
+    python benchmark.py                      # full run
+    python benchmark.py --quick -k generate  # fewer runs, matching benchmarks only
+    python benchmark.py --save base.json     # keep results to compare against
+    python benchmark.py --baseline base.json # exit 1 if anything got slower
+"""
+
+import sys
+import os
+import argparse
+import json
+import random
+import time
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import WebScraper, CrosswordGenerator, DefinitionCache, Direction, TextExtractor
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_fixtures')
+
+# Relative letter weights used to draw synthetic words
+LETTER_DISTRIBUTIONS = {
+    # Roughly the letter frequencies of English text
+    'english': {
+        'e': 12.7, 't': 9.1, 'a': 8.2, 'o': 7.5, 'i': 7.0, 'n': 6.7, 's': 6.3, 'h': 6.1,
+        'r': 6.0, 'd': 4.3, 'l': 4.0, 'c': 2.8, 'u': 2.8, 'm': 2.4, 'w': 2.4, 'f': 2.2,
+        'g': 2.0, 'y': 2.0, 'p': 1.9, 'b': 1.5, 'v': 1.0, 'k': 0.8, 'j': 0.2, 'x': 0.2,
+        'q': 0.1, 'z': 0.1,
+    },
+    'uniform': {letter: 1 for letter in 'abcdefghijklmnopqrstuvwxyz'},
+    # Few shared letters, so crossings are rare
+    'sparse': {letter: 1 for letter in 'bcdfghjklmnpqrstvwxyz'},
+}
+
+WORD_LIST_SIZES = (10, 30, 60)
+
+def synthetic_words(count, distribution, seed, min_length=3, max_length=10):
+    """Distinct random words with letters drawn from a distribution"""
+    rng = random.Random(f"{seed}-{distribution}-{count}")
+    letters = list(LETTER_DISTRIBUTIONS[distribution])
+    weights = list(LETTER_DISTRIBUTIONS[distribution].values())
+    words = {}
+    while len(words) < count:
+        length = rng.randint(min_length, max_length)
+        word = ''.join(rng.choices(letters, weights, k=length))
+        words[word] = None
+    return [{'word': word, 'definition': f"Clue for {word}"} for word in words]
+
+def load_fixtures():
+    """Saved HTML pages, plus one large page made of many copies of them"""
+    pages = {}
+    for name in sorted(os.listdir(FIXTURES_DIR)):
+        if name.endswith('.html'):
+            with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+                pages[name] = f.read()
+    body = b''.join(pages.values())
+    pages['large.html'] = b'<html><body>' + body * 100 + b'</body></html>'
+    return pages
+
+def page_text(html):
+    """Text content of a page, as the scraper's parser sees it"""
+    parser = TextExtractor()
+    parser.feed(html.decode('utf-8'))
+    parser.close()
+    return parser.take_text()
+
+class FixtureResponse:
+    """Streamed response serving a saved page"""
+
+    def __init__(self, body):
+        self.status_code = 200
+        self.body = body
+        self.headers = {'content-type': 'text/html; charset=utf-8'}
+        self.encoding = 'utf-8'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+class FixtureSession:
+    """Stands in for requests.Session, serving pages by file name"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.headers = {'User-Agent': 'crossword-benchmark'}
+
+    def get(self, url, **kwargs):
+        return FixtureResponse(self.pages[url.rsplit('/', 1)[1]])
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a sorted list"""
+    index = max(0, min(len(samples) - 1, int(round(fraction * len(samples))) - 1))
+    return samples[index]
+
+def measure(func, runs, calls_per_run=1, nbytes=None):
+    """Time runs of func, each making calls_per_run calls
+
+    Returns calls per second, MB per second when nbytes (bytes handled per
+    call) is given, and per-call percentiles in microseconds.
+    """
+    func()  # Warm caches and imports outside the measurement
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) / calls_per_run)
+    samples.sort()
+    total = sum(samples)
+    result = {
+        'calls_per_second': len(samples) / total if total else float('inf'),
+        'p50_us': percentile(samples, 0.50) * 1e6,
+        'p90_us': percentile(samples, 0.90) * 1e6,
+        'p99_us': percentile(samples, 0.99) * 1e6,
+        'max_us': samples[-1] * 1e6,
+    }
+    if nbytes is not None:
+        result['mb_per_second'] = nbytes * result['calls_per_second'] / 1e6
+    return result
+
+def laid_out(words_with_definitions, seed):
+    """One greedy layout of the words"""
+    generator = CrosswordGenerator()
+    sorted_words = sorted(words_with_definitions, key=lambda x: len(x['word']), reverse=True)
+    layout = generator.new_layout(generator.choose_grid_size(sorted_words), seed)
+    generator.layout_greedy(layout, sorted_words)
+    return layout
+
+def bench_get_intersections(words_with_definitions, seed, runs):
+    layout = laid_out(words_with_definitions, seed)
+    probes = [word_data['word'].upper() for word_data in words_with_definitions]
+
+    def run():
+        for word in probes:
+            layout.get_intersections(word)
+
+    return measure(run, runs, len(probes))
+
+def bench_can_place_word(words_with_definitions, seed, runs):
+    layout = laid_out(words_with_definitions, seed)
+    rng = random.Random(seed)
+    probes = []
+    for word_data in words_with_definitions:
+        word = word_data['word'].upper()
+        probes.extend((word, row, col, direction)
+                      for row, col, direction in layout.get_intersections(word))
+        for _ in range(5):
+            probes.append((word, rng.randrange(layout.size - len(word) + 1),
+                           rng.randrange(layout.size - len(word) + 1),
+                           rng.choice(list(Direction))))
+
+    def run():
+        for word, row, col, direction in probes:
+            layout.can_place_word(word, row, col, direction)
+
+    return measure(run, runs, len(probes))
+
+def bench_generate_crossword(words_with_definitions, seed, runs):
+    generator = CrosswordGenerator()
+
+    def run():
+        generator.generate_crossword(words_with_definitions, time_limit=60, max_attempts=10, seed=seed)
+
+    return measure(run, runs)
+
+def bench_extract_words_from_text(text, runs):
+    scraper = WebScraper(definitions=DefinitionCache())
+    return measure(lambda: scraper.extract_words_from_text(text), runs,
+                   nbytes=len(text.encode('utf-8')))
+
+def bench_scrape_website(pages, name, runs):
+    scraper = WebScraper(definitions=DefinitionCache())
+    scraper.session = FixtureSession(pages)
+    # Keep WordNet out of the measurement, only fetching and parsing count
+    scraper.lookup_definition = lambda word: f"Definition of {word}"
+    url = f"https://fixtures.example/{name}"
+    return measure(lambda: scraper.scrape_website(url), runs, nbytes=len(pages[name]))
+
+def collect_benchmarks(seed, quick):
+    """(name, thunk) pairs for every benchmark"""
+    scale = 1 if quick else 5
+    benchmarks = []
+    for distribution in LETTER_DISTRIBUTIONS:
+        for size in WORD_LIST_SIZES:
+            words = synthetic_words(size, distribution, seed)
+            suffix = f"{distribution}-{size}"
+            benchmarks.append((f"get_intersections[{suffix}]",
+                               lambda words=words: bench_get_intersections(words, seed, 20 * scale)))
+            benchmarks.append((f"can_place_word[{suffix}]",
+                               lambda words=words: bench_can_place_word(words, seed, 20 * scale)))
+            benchmarks.append((f"generate_crossword[{suffix}]",
+                               lambda words=words: bench_generate_crossword(words, seed, 2 * scale)))
+
+    pages = load_fixtures()
+    for name in pages:
+        text = page_text(pages[name])
+        benchmarks.append((f"extract_words_from_text[{name}]",
+                           lambda text=text, runs=20 * scale: bench_extract_words_from_text(text, runs)))
+        benchmarks.append((f"scrape_website[{name}]",
+                           lambda name=name: bench_scrape_website(pages, name, 10 * scale)))
+    return benchmarks
+
+def format_result(name, result):
+    line = (f"{name:<42} {result['calls_per_second']:>12.1f}/s "
+            f"p50 {result['p50_us']:>10.1f}us  p90 {result['p90_us']:>10.1f}us  "
+            f"p99 {result['p99_us']:>10.1f}us")
+    if 'mb_per_second' in result:
+        line += f"  {result['mb_per_second']:.2f} MB/s"
+    return line
+
+def compare(results, baseline, tolerance):
+    """Names of benchmarks whose median got more than tolerance slower"""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before and result['p50_us'] > before['p50_us'] * (1 + tolerance):
+            regressions.append((name, before['p50_us'], result['p50_us']))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seed', type=int, default=1234, help='Seed for word lists and layouts')
+    parser.add_argument('--quick', action='store_true', help='Fewer runs per benchmark')
+    parser.add_argument('-k', dest='pattern', default='', help='Only run benchmarks containing this text')
+    parser.add_argument('--output', help='Also write the report to this file')
+    parser.add_argument('--save', help='Write the results as JSON')
+    parser.add_argument('--baseline', help='JSON results to compare the medians against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed median slowdown against the baseline (default: 0.25)')
+    args = parser.parse_args(argv)
+
+    lines = [f"Crossword benchmarks (seed {args.seed}, python {sys.version.split()[0]})", "=" * 50]
+    print("\n".join(lines))
+    results = {}
+    for name, run in collect_benchmarks(args.seed, args.quick):
+        if args.pattern not in name:
+            continue
+        results[name] = run()
+        lines.append(format_result(name, results[name]))
+        print(lines[-1], flush=True)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)['results'], args.tolerance)
+        lines.append("")
+        for name, before, after in regressions:
+            lines.append(f"REGRESSION {name}: p50 {before:.1f}us -> {after:.1f}us")
+        lines.append(f"{len(regressions)} regression(s) against {args.baseline}")
+        print("\n".join(lines[-len(regressions) - 2:]))
+        status = 1 if regressions else 0
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write("\n".join(lines) + "\n")
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'seed': args.seed, 'quick': args.quick, 'results': results}, f, indent=2)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
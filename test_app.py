@@ -5,11 +5,19 @@ Simple test script for the Random Crossword Generator
 
 import sys
 import os
+import json
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
 
 # Add the current directory to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app import WebScraper, CrosswordGenerator
+from app import WebScraper, CrosswordGenerator, CrossingTable, Direction, letter_signature, DefinitionCache, DictionaryIndex, PageCache, PuzzleCache, JobQueue, JobQueueFull, GRID_BACKENDS, LAYOUT_ENGINES, Metrics, iter_batch, puzzle_request
+from app import app as flask_app
 
 def test_web_scraper():
     """Test the web scraper functionality"""
@@ -33,10 +41,255 @@ def test_web_scraper():
     words = scraper.extract_words_from_text(test_text)
     assert len(words) > 0
     assert "computer" in words or "programming" in words
+    assert "the" not in words and "fun" in words
     print("✓ Word extraction works")
     
+    # Length and alphabet filters
+    ascii_scraper = WebScraper(min_word_length=5, alphabet='abcdefghijklmnopqrstuvwxyz')
+    words = ascii_scraper.extract_words_from_text("Café menus list crêpes and waffles")
+    assert sorted(words) == ['menus', 'waffles']
+    print("✓ Word filters work")
+    
+    # Streaming HTML extraction, with words split across chunks
+    html = (b'<html><head><style>p { color: red }</style></head><body>'
+            b'<script>var hidden = 1;</script><div><p>Streaming parsers</p>'
+            b'<ul><li>handle <b>chunked</b> markup</li></ul></div><span>outside</span></body></html>')
+    chunks = [html[i:i + 7] for i in range(0, len(html), 7)]
+    words = scraper.extract_words_from_html(chunks)
+    assert words == ['streaming', 'parsers', 'handle', 'chunked', 'markup']
+    assert WebScraper(word_budget=2).extract_words_from_html(chunks) == ['streaming', 'parsers']
+    assert WebScraper(max_bytes=140).extract_words_from_html(chunks) == ['streaming', 'parsers', 'handle']
+    print("✓ Streaming HTML extraction works")
+    
     print("Web Scraper tests passed!\n")
 
+def test_definition_cache():
+    """Test the LRU + SQLite definition cache"""
+    print("Testing Definition Cache...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'definitions.sqlite3')
+        cache = DefinitionCache(path, max_entries=2)
+        cache.put_many([('alpha', 'first letter'), ('beta', None), ('gamma', 'third letter')])
+        assert 'alpha' not in cache._entries
+        assert cache.get('alpha') == (True, 'first letter')
+        assert cache.get('beta') == (True, None)
+        assert cache.get('delta') == (False, None)
+        print("✓ LRU and disk lookups work")
+        
+        # Another worker process sees the same store
+        other = DefinitionCache(path)
+        assert other.get('gamma') == (True, 'third letter')
+        
+        scraper = WebScraper(definitions=other)
+        assert scraper.get_word_definition('Gamma') == 'third letter'
+        assert scraper.get_word_definition('beta') == 'A beta'
+        print("✓ Shared definition store works")
+    
+    print("Definition cache tests passed!\n")
+
+def test_dictionary_index():
+    """Test the memory-mapped dictionary index"""
+    print("Testing Dictionary Index...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'dictionary.idx')
+        DictionaryIndex.build(path, [
+            ('zebra', 0, 'striped horse'),
+            ('house', 2, 'a building for living in'),
+            ('the', 1, None),
+            ('café', 5, 'a small restaurant'),
+            ('apple', 3, 'fruit with red or green skin'),
+        ])
+        index = DictionaryIndex(path)
+        assert index.count == 5
+        assert index.get('house') == (True, 'a building for living in')
+        assert index.get('café') == (True, 'a small restaurant')
+        assert index.get('the') == (True, None)
+        assert index.get('missing') == (False, None)
+        print("✓ Index lookups work")
+        
+        ranked = index.rank_words(['zebra', 'unknown', 'the', 'apple', 'house', 'other'])
+        assert ranked == ['house', 'apple', 'zebra', 'unknown', 'other', 'the']
+        print("✓ Bulk ranking works")
+        
+        scraper = WebScraper(definitions=DefinitionCache(), index=index)
+        def no_wordnet(word):
+            raise AssertionError(f"{word} should come from the index")
+        scraper.lookup_definition = no_wordnet
+        assert scraper.get_word_definition('Zebra') == 'striped horse'
+        assert scraper.get_word_definition('the') == 'A the'
+        assert scraper.rank_words(['zebra', 'house']) == ['house', 'zebra']
+        print("✓ Scraper uses the index before WordNet")
+        index.close()
+    
+    print("Dictionary index tests passed!\n")
+
+class FakeResponse:
+    """Minimal stand-in for a streamed requests response"""
+    
+    def __init__(self, status_code=200, body=b'', headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+        self.encoding = 'utf-8'
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+    
+    @property
+    def text(self):
+        return self.body.decode('utf-8')
+    
+    def raise_for_status(self):
+        pass
+    
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+class FakeSession:
+    """Serves canned responses and records the request headers"""
+    
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+    
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append((url, headers or {}))
+        return self.responses.pop(0)
+
+def test_page_cache():
+    """Test the scraped-page cache and HTTP revalidation"""
+    print("Testing Page Cache...")
+    
+    assert PageCache.normalize_url('HTTPS://Example.COM:443#top') == 'https://example.com/'
+    assert PageCache.normalize_url('http://example.com:8080/a?b=1') == 'http://example.com:8080/a?b=1'
+    
+    cache = PageCache(max_bytes=200)
+    cache.put('https://a.example/', [{'word': 'alpha', 'definition': 'x' * 50}], etag='"a"')
+    cache.put('https://b.example/', [{'word': 'beta', 'definition': 'y' * 50}], etag='"b"')
+    cache.put('https://c.example/', [{'word': 'gamma', 'definition': 'z' * 50}], etag='"c"')
+    assert cache.get('https://a.example/') is None
+    assert cache.get('https://c.example') is not None
+    assert cache.size <= 200
+    print("✓ Size-based eviction works")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        scraper = WebScraper(definitions=DefinitionCache(os.path.join(tmp, 'defs.sqlite3')))
+        scraper.session = FakeSession([
+            FakeResponse(body=b'<p>Revalidated pages</p>', headers={'ETag': '"v1"'}),
+            FakeResponse(status_code=304),
+        ])
+        first = scraper.scrape_website('https://example.com/page')
+        second = scraper.scrape_website('https://EXAMPLE.com/page#intro')
+        assert [item['word'] for item in first] == ['revalidated', 'pages']
+        assert second == first
+        assert scraper.session.requests[1][1] == {'If-None-Match': '"v1"'}
+    print("✓ Conditional GET revalidation works")
+    
+    print("Page cache tests passed!\n")
+
+class SlowSession:
+    """Serves the same page slowly and records peak concurrency per host"""
+    
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.active = {}
+        self.peak = {}
+        self.lock = threading.Lock()
+    
+    def get(self, url, **kwargs):
+        host = url.split('/')[2]
+        with self.lock:
+            self.active[host] = self.active.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.active[host])
+        time.sleep(self.delay)
+        with self.lock:
+            self.active[host] -= 1
+        if 'missing' in url:
+            raise requests.ConnectionError("no route to host")
+        return FakeResponse(body=b'<p>Concurrent fetching</p>')
+
+def test_concurrent_fetch():
+    """Test overlapping fetches with per-host limits"""
+    print("Testing Concurrent Fetching...")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        scraper = WebScraper(definitions=DefinitionCache(os.path.join(tmp, 'defs.sqlite3')),
+                             pool_size=8, host_limit=2)
+        scraper.session = SlowSession()
+        urls = [f'https://{host}.example/{i}' for host in ('a', 'b') for i in range(4)]
+        urls.append('https://missing.example/')
+        
+        started = time.time()
+        results = {url: (words, error) for url, words, error in scraper.iter_scrape(urls)}
+        elapsed = time.time() - started
+        
+        assert set(results) == set(urls)
+        assert [item['word'] for item in results[urls[0]][0]] == ['concurrent', 'fetching']
+        assert 'Failed to fetch website' in str(results['https://missing.example/'][1])
+        assert scraper.session.peak == {'a.example': 2, 'b.example': 2, 'missing.example': 1}
+        assert elapsed < 9 * scraper.session.delay
+    print("✓ Fetches overlap within per-host limits")
+    
+    print("Concurrent fetching tests passed!\n")
+
+class SiteSession:
+    """Serves a small site from a dict of paths and records what was fetched"""
+    
+    def __init__(self, pages):
+        self.pages = pages
+        self.fetched = []
+        self.headers = {'User-Agent': 'test-agent'}
+    
+    def get(self, url, **kwargs):
+        self.fetched.append(url)
+        path = '/' + url.split('/', 3)[3] if url.count('/') > 2 else '/'
+        if path not in self.pages:
+            return FakeResponse(status_code=404)
+        return FakeResponse(body=self.pages[path].encode('utf-8'))
+
+def test_crawl():
+    """Test same-site crawling with robots.txt and a word target"""
+    print("Testing Crawl Mode...")
+    
+    site = {
+        '/robots.txt': 'User-agent: *\nDisallow: /private\n',
+        '/': ('<p>Alpha beta</p><a href="/a">A</a><a href="b#top">B</a><a href="/private">P</a>'
+              '<a href="https://other.example/x">X</a><a href="mailto:me@example.com">M</a>'),
+        '/a': '<p>Gamma delta</p><a href="/deep">Deeper</a>',
+        '/b': '<p>Epsilon</p><a href="/">Home</a>',
+        '/private': '<p>Secret</p>',
+        '/deep': '<p>Omega</p>',
+    }
+    words = ['alpha', 'beta', 'gamma', 'delta', 'epsilon', 'secret', 'omega']
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        definitions = DefinitionCache(os.path.join(tmp, 'defs.sqlite3'))
+        definitions.put_many([(word, f"Letter {word}") for word in words])
+        
+        scraper = WebScraper(definitions=definitions)
+        scraper.session = SiteSession(site)
+        crawled = scraper.crawl_website('https://example.com/', max_depth=1)
+        assert {item['word'] for item in crawled} == {'alpha', 'beta', 'gamma', 'delta', 'epsilon'}
+        assert crawled[0] == {'word': 'alpha', 'definition': 'Letter alpha'}
+        assert sorted(scraper.session.fetched) == ['https://example.com/', 'https://example.com/a',
+                                                   'https://example.com/b', 'https://example.com/robots.txt']
+        print("✓ Same-site links are followed within depth and robots.txt")
+        
+        scraper = WebScraper(definitions=definitions)
+        scraper.session = SiteSession(site)
+        crawled = scraper.crawl_website('https://example.com/', max_depth=2, target_words=2)
+        assert [item['word'] for item in crawled] == ['alpha', 'beta']
+        assert scraper.session.fetched == ['https://example.com/']
+        print("✓ Crawling stops once enough words are defined")
+    
+    print("Crawl tests passed!\n")
+
 def test_crossword_generator():
     """Test the crossword generator functionality"""
     print("Testing Crossword Generator...")
@@ -52,28 +305,272 @@ def test_crossword_generator():
     
     # Test word placement
     test_word = "HELLO"
-    generator.grid = generator.create_grid(10)  # Initialize grid first
-    assert generator.can_place_word(test_word, 0, 0, 'horizontal') == True
-    generator.place_word(test_word, 0, 0, 'horizontal')
-    assert generator.grid[0][:5] == ['H', 'E', 'L', 'L', 'O']
+    layout = generator.new_layout(10)
+    assert layout.can_place_word(test_word, 0, 0, Direction.HORIZONTAL) == True
+    layout.place_word(test_word, 0, 0, Direction.HORIZONTAL)
+    assert layout.grid[0][:5] == ['H', 'E', 'L', 'L', 'O']
     print("✓ Word placement works")
     
+    # Letters outside ASCII get per-layout grid codes
+    layout = generator.new_layout(10)
+    layout.add_word({'definition': 'A small restaurant'}, 'CAFÉ', 4, 2, Direction.HORIZONTAL)
+    assert layout.can_place_word('ÉTÉ', 4, 5, Direction.VERTICAL)
+    assert not layout.can_place_word('ÜBER', 4, 5, Direction.VERTICAL)
+    layout.add_word({'definition': 'Summer'}, 'ÉTÉ', 4, 5, Direction.VERTICAL)
+    assert layout.can_cross(letter_signature('ÉTÉ'))
+    cropped = generator.crop_puzzle(layout.snapshot_puzzle(1))
+    assert cropped['grid'] == [list('CAFÉ'), list('   T'), list('   É')]
+    print("✓ Non-ASCII words work")
+    
     # Test intersection finding
-    generator.grid = generator.create_grid(10)
-    generator.positions = [{
-        'word': 'WORLD',
-        'row': 2,
-        'col': 2,
-        'direction': 'horizontal'
-    }]
-    generator.place_word('WORLD', 2, 2, 'horizontal')
-    
-    intersections = generator.get_intersections('HELLO')
+    layout = generator.new_layout(10)
+    layout.place_word('WORLD', 2, 2, Direction.HORIZONTAL)
+    
+    intersections = layout.get_intersections('HELLO')
     assert len(intersections) > 0
+    # The L of HELLO (index 2) crosses the L of WORLD at row 2, col 5
+    assert (0, 5, Direction.VERTICAL) in intersections
+    assert len(intersections) == len(set(intersections))
     print("✓ Intersection finding works")
     
+    # The crossing table lists shared letters as (offset, offset) pairs
+    table = CrossingTable(['CAT', 'TACT', 'DOG'])
+    assert sorted(table.pairs[0][1]) == [(0, 2), (1, 1), (2, 0), (2, 3)]
+    assert sorted(table.pairs[1][0]) == [(0, 2), (1, 1), (2, 0), (3, 2)]
+    assert table.count(0, 2) == 0
+    # TACT crossing CAT, placed across at (5, 2), through its A
+    assert table.candidates(1, [(0, 5, 2, Direction.HORIZONTAL)])[(4, 3, Direction.VERTICAL)] == 1
+    print("✓ Crossing table works")
+    
+    # Threads share one generator; each generation borrows its own layout
+    words = [{'word': w, 'definition': f"Clue for {w}"} for w in
+             ["python", "program", "computer", "algorithm", "function", "network", "memory"]]
+    expected = generator.generate_crossword(words, time_limit=10, max_attempts=10, seed=7)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: generator.generate_crossword(
+            words, time_limit=10, max_attempts=10, seed=7), range(8)))
+    assert all(result == expected for result in results)
+    print("✓ Concurrent generations do not share state")
+    
     print("Crossword Generator tests passed!\n")
 
+def test_grid_backends():
+    """Test the array-backed grid backends"""
+    print("Testing Grid Backends...")
+    
+    for backend in GRID_BACKENDS:
+        layout = CrosswordGenerator(grid_backend=backend).new_layout(6)
+        layout.place_word('CAT', 1, 1, Direction.VERTICAL)
+        assert layout.can_place_word('BAD', 2, 0, Direction.HORIZONTAL) == True
+        assert layout.can_place_word('BOD', 2, 0, Direction.HORIZONTAL) == False
+        assert layout.can_place_word('CATTLE', 1, 1, Direction.VERTICAL) == False
+        # Adjacency rules: no parallel neighbours, no running into other words
+        assert layout.can_place_word('DOG', 1, 2, Direction.VERTICAL) == False
+        assert layout.can_place_word('OX', 0, 0, Direction.HORIZONTAL) == False
+        assert layout.can_place_word('SCAT', 0, 1, Direction.VERTICAL) == False
+        
+        snapshot = layout.grid.snapshot()
+        layout.place_word('BAD', 2, 0, Direction.HORIZONTAL)
+        assert layout.grid.to_rows(snapshot)[2] == [' ', 'A', ' ', ' ', ' ', ' ']
+        assert layout.grid.to_rows()[2] == ['B', 'A', 'D', ' ', ' ', ' ']
+        assert layout.grid.filled_count() == 5
+        
+        assert layout.filled_cells == 5
+        assert (layout.word_count, layout.total_length) == (2, 6)
+        assert layout.bbox == (1, 0, 3, 2)
+        assert layout.bbox_density() == 5 / 9
+        
+        # An invalid placement voids the score until it is taken back
+        valid_score = layout.calculate_puzzle_score()
+        assert valid_score != 0
+        mask = layout.letter_mask
+        undo = layout.place_word('DOG', 1, 2, Direction.VERTICAL)
+        assert layout.calculate_puzzle_score() == 0
+        layout.unplace_word('DOG', 1, 2, Direction.VERTICAL, undo)
+        assert layout.calculate_puzzle_score() == valid_score
+        assert layout.letter_mask == mask
+        
+        # The A of CAT and BAD is crossed twice, so only B, C, D and T are open
+        assert mask == letter_signature('BCDT')
+        assert layout.can_cross(letter_signature('TOY'))
+        assert not layout.can_cross(letter_signature('AAH'))
+        assert layout.skipped_words == 1
+        
+        # Starting over at the same size clears the grid in place
+        grid = layout.grid
+        layout.reset(6)
+        assert layout.grid is grid and grid.filled_count() == 0 and layout.positions == []
+        print(f"✓ {backend} grid works")
+    
+    print("Grid backend tests passed!\n")
+
+def test_puzzle_cache():
+    """Test seeded generation and the finished-puzzle cache"""
+    print("Testing Puzzle Cache...")
+    
+    words = [{'word': w, 'definition': f"Clue for {w}"} for w in
+             ["python", "program", "computer", "algorithm", "function", "variable",
+              "network", "memory", "storage", "keyboard"]]
+    generator = CrosswordGenerator()
+    first = generator.generate_crossword(words, time_limit=10, max_attempts=20, seed=42)
+    second = generator.generate_crossword(words, time_limit=10, max_attempts=20, seed=42)
+    assert first['grid'] == second['grid'] and first['positions'] == second['positions']
+    print("✓ Seeded generation is reproducible")
+    
+    normalized = PuzzleCache.normalize_words(list(reversed(words)) + [{'word': 'Python', 'definition': 'x'}])
+    assert normalized == PuzzleCache.normalize_words(words)
+    options = generator.worker_options()
+    key = PuzzleCache.make_key(normalized, options, 42)
+    assert key != PuzzleCache.make_key(normalized, options, 43)
+    assert key != PuzzleCache.make_key(normalized, dict(options, max_size=20), 42)
+    # A quick batch run is never served for a full request
+    quick = puzzle_request(words, 42, generator, time_limit=10, max_attempts=1)[2]
+    assert quick != puzzle_request(words, 42, generator)[2]
+    assert quick != puzzle_request(words, 42, generator, time_limit=60, max_attempts=1)[2]
+    print("✓ Cache keys follow the normalized inputs")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'puzzles.sqlite3')
+        cache = PuzzleCache(path, max_entries=1)
+        cache.put(key, first)
+        cache.put('other', {'score': 1})
+        assert key not in cache._entries
+        assert cache.get(key) == first
+        assert PuzzleCache(path).get('other') == {'score': 1}
+        
+        expired = PuzzleCache(path, ttl=0)
+        assert expired.get(key) is None
+        print("✓ LRU, disk and TTL lookups work")
+    
+    print("Puzzle cache tests passed!\n")
+
+def test_job_queue():
+    """Test the background job queue"""
+    print("Testing Job Queue...")
+    
+    release = threading.Event()
+    
+    def run(url):
+        release.wait(5)
+        if 'broken' in url:
+            raise ValueError("No suitable words found on the website")
+        return {'success': True, 'source_url': url}
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'jobs.sqlite3')
+        queue = JobQueue(run, path, max_workers=1, max_pending=2)
+        first, created = queue.submit('https://example.com/a')
+        assert created and first['status'] in ('queued', 'running')
+        same, created = queue.submit('https://EXAMPLE.com/a#top')
+        assert not created and same['id'] == first['id']
+        print("✓ In-flight deduplication works")
+        
+        # Another worker process sees the same jobs through the store
+        other = JobQueue(run, path, max_workers=1, max_pending=2)
+        assert other.get(first['id'])['url'] == 'https://example.com/a'
+        same, created = other.submit('https://example.com/a')
+        assert not created and same['id'] == first['id']
+        print("✓ Jobs are shared between queues")
+        
+        broken, _ = queue.submit('https://example.com/broken')
+        try:
+            other.submit('https://example.com/c')
+            assert False, "queue should be full"
+        except JobQueueFull:
+            pass
+        print("✓ Queue depth limit works")
+        
+        release.set()
+        first = other.wait(first['id'], 5)
+        broken = queue.wait(broken['id'], 5)
+        assert JobQueue.describe(first) == {'job_id': first['id'], 'status': 'done',
+                                            'url': 'https://example.com/a', 'success': True,
+                                            'source_url': 'https://example.com/a'}
+        assert JobQueue.describe(broken)['error'] == "No suitable words found on the website"
+        assert queue.get(first['id']) == first and other.pending() == 0
+        print("✓ Job results work")
+    
+    print("Job queue tests passed!\n")
+
+def test_batch():
+    """Test batch generation over word lists"""
+    print("Testing Batch Generation...")
+    
+    words = ["python", "program", "computer", "algorithm", "function", "variable",
+             "network", "memory", "storage", "keyboard", "monitor", "printer"]
+    items = [
+        {'id': 'dicts', 'words': [{'word': w, 'definition': f"Clue for {w}"} for w in words]},
+        {'id': 'pairs', 'words': [[w, f"Clue for {w}"] for w in reversed(words)]},
+        {'id': 'bad', 'words': [["not a word", "Spaces"]]},
+        42,
+    ]
+    results = sorted(iter_batch(items, workers=2, time_limit=2, max_attempts=5),
+                     key=lambda result: result['index'])
+    
+    assert [result['index'] for result in results] == [0, 1, 2, 3]
+    assert results[0]['success'] and results[0]['source'] == 'dicts'
+    assert results[1]['success'] and results[1]['puzzle']['words']
+    print("✓ Word lists generate in parallel")
+    
+    assert not results[2]['success'] and 'Invalid word' in results[2]['error']
+    assert not results[3]['success'] and results[3]['source'] is None
+    print("✓ Invalid items are reported without failing the batch")
+    
+    # A malformed line in the batch command's input fails only that line
+    with tempfile.TemporaryDirectory() as tmpdir:
+        input_path = os.path.join(tmpdir, 'input.jsonl')
+        output_path = os.path.join(tmpdir, 'output.jsonl')
+        with open(input_path, 'w') as f:
+            f.write('{"words": [["not a word", "Spaces"]]}\n{"url": \n[1, 2]\n')
+        runner = flask_app.test_cli_runner()
+        outcome = runner.invoke(args=['batch', input_path, output_path, '--workers', '1'])
+        assert outcome.exit_code == 0, outcome.output
+        with open(output_path) as f:
+            lines = sorted((json.loads(line) for line in f), key=lambda result: result['index'])
+    assert [result['index'] for result in lines] == [0, 1, 2]
+    assert not any(result['success'] for result in lines)
+    assert 'Invalid JSON' in lines[1]['error']
+    print("✓ A malformed input line is reported without stopping the batch command")
+    
+    print("Batch tests passed!\n")
+
+def test_metrics():
+    """Test stage timers and the Prometheus rendering"""
+    print("Testing Metrics...")
+    
+    disabled = Metrics()
+    with disabled.stage('fetch'):
+        pass
+    disabled.observe('crossword_attempt_words', 3)
+    assert disabled.render().count('_count') == 0
+    print("✓ Disabled metrics record nothing")
+    
+    metrics = Metrics(enabled=True)
+    metrics.start_request()
+    with metrics.stage('fetch'):
+        time.sleep(0.01)
+    metrics.observe_stage('parse', 0.002)
+    metrics.observe_stage('parse', 0.003)
+    timings = metrics.finish_request()
+    assert set(timings) == {'fetch', 'parse'} and timings['fetch'] >= 0.01
+    assert abs(timings['parse'] - 0.005) < 1e-9
+    metrics.observe_stage('parse', 1.0)
+    assert metrics.finish_request() == {}
+    print("✓ Per-request stage timings work")
+    
+    metrics.observe('crossword_attempt_words', 12)
+    text = metrics.render()
+    pid = os.getpid()
+    assert '# TYPE crossword_stage_seconds histogram' in text
+    assert f'crossword_stage_seconds_bucket{{pid="{pid}",stage="parse",le="0.005"}} 2' in text
+    assert f'crossword_stage_seconds_bucket{{pid="{pid}",stage="parse",le="+Inf"}} 3' in text
+    assert f'crossword_stage_seconds_count{{pid="{pid}",stage="parse"}} 3' in text
+    assert f'crossword_attempt_words_bucket{{pid="{pid}",le="10"}} 0' in text
+    assert f'crossword_attempt_words_count{{pid="{pid}"}} 1' in text
+    print("✓ Prometheus rendering works")
+    
+    print("Metrics tests passed!\n")
+
 def test_integration():
     """Test the integration of components"""
     print("Testing Integration...")
@@ -99,6 +596,46 @@ def test_integration():
     else:
         print("⚠ No puzzle generated in test (this may be normal for small word sets)")
     
+    more_words = test_words + [
+        {'word': word, 'definition': f'A {word}'}
+        for word in ['grid', 'letter', 'across', 'answer', 'clue', 'puzzle', 'generator']
+    ]
+    parallel = CrosswordGenerator(workers=2, attempts_per_task=5)
+    puzzle = parallel.generate_crossword(more_words, time_limit=5, max_attempts=20)
+    assert puzzle and 'grid' in puzzle
+    print("✓ Parallel crossword generation works")
+    
+    backtracking = CrosswordGenerator(engine='backtrack', node_budget=500)
+    puzzle = backtracking.generate_crossword(more_words, time_limit=5)
+    assert puzzle and len(puzzle['words']) == len(puzzle['positions'])
+    
+    # A longest word that cannot be placed does not stop either engine
+    too_long = [{'word': 'x' * 40, 'definition': 'Too long'}] + more_words[:7]
+    for engine in LAYOUT_ENGINES:
+        puzzle = CrosswordGenerator(engine=engine, node_budget=500).generate_crossword(too_long, time_limit=5)
+        assert puzzle and 'X' * 40 not in puzzle['words']
+    print("✓ Backtracking layout engine works")
+    
+    # The grid is cropped to the placed words and positions follow it
+    grid = puzzle['grid']
+    assert any(cell != ' ' for cell in grid[0]) and any(cell != ' ' for cell in grid[-1])
+    assert any(row[0] != ' ' for row in grid) and any(row[-1] != ' ' for row in grid)
+    for pos in puzzle['positions']:
+        assert pos['direction'] in ('horizontal', 'vertical')
+        for i, letter in enumerate(pos['word']):
+            if pos['direction'] == 'horizontal':
+                assert grid[pos['row']][pos['col'] + i] == letter
+            else:
+                assert grid[pos['row'] + i][pos['col']] == letter
+    print("✓ Grid cropping works")
+    
+    # Anytime generation yields every improvement, best last
+    improvements = list(CrosswordGenerator().iter_crossword(more_words, time_limit=5))
+    assert improvements
+    assert all(a['score'] <= b['score'] for a, b in zip(improvements, improvements[1:]))
+    assert all(isinstance(puzzle['grid'], list) for puzzle in improvements)
+    print("✓ Streaming generation works")
+    
     print("Integration tests completed!\n")
 
 if __name__ == "__main__":
@@ -107,7 +644,17 @@ if __name__ == "__main__":
     
     try:
         test_web_scraper()
+        test_definition_cache()
+        test_dictionary_index()
+        test_page_cache()
+        test_concurrent_fetch()
+        test_crawl()
         test_crossword_generator()
+        test_grid_backends()
+        test_puzzle_cache()
+        test_job_queue()
+        test_batch()
+        test_metrics()
         test_integration()
         
         print("=" * 50)